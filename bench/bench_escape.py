@@ -0,0 +1,74 @@
+import os, sys, time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import events
+from events import render_html
+from functions import markdown_to_events
+
+def load_corpus(content_dir, copies):
+    pages = []
+    for root, _, files in os.walk(content_dir):
+        for file in sorted(files):
+            if file.endswith(".md"):
+                with open(os.path.join(root, file)) as f:
+                    pages.append(f.read())
+    return pages * copies
+
+def raw_escape_text(text):
+    return text
+
+def raw_props_to_html(props):
+    if not props:
+        return ""
+    return "".join(f' {key}="{value}"' for key, value in props.items())
+
+def best_of(runs, fn):
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    copies = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    root = os.path.join(os.path.dirname(__file__), "..")
+    corpus = load_corpus(os.path.join(root, "content"), copies)
+    # The build renders each page's event stream with events.render_html.
+    streams = [list(markdown_to_events(md)) for md in corpus]
+
+    def render():
+        for stream in streams:
+            render_html(stream)
+
+    escape_text, props_to_html = events.escape_text, events.props_to_html
+
+    def render_raw():
+        # Swap in serializers that do not escape to measure the baseline.
+        events.escape_text, events.props_to_html = raw_escape_text, raw_props_to_html
+        try:
+            render()
+        finally:
+            events.escape_text, events.props_to_html = escape_text, props_to_html
+
+    # Interleave the runs so both variants see the same machine noise.
+    escaped = raw = float("inf")
+    for _ in range(7):
+        raw = min(raw, best_of(1, render_raw))
+        escaped = min(escaped, best_of(1, render))
+
+    def pipeline():
+        for md in corpus:
+            render_html(markdown_to_events(md))
+
+    full = best_of(3, pipeline)
+
+    print(f"pages: {len(streams)}")
+    print(f"serialize without escaping: {raw * 1000:.1f} ms")
+    print(f"serialize with escaping:    {escaped * 1000:.1f} ms")
+    print(f"overhead vs serialization:  {(escaped - raw) / raw * 100:.1f}%")
+    print(f"overhead vs parse+render:   {(escaped - raw) / full * 100:.1f}%")
+
+if __name__ == "__main__":
+    main()
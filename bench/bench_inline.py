@@ -0,0 +1,53 @@
+import os, sys, time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from functions import text_to_textnodes, extract_markdown_links, extract_markdown_images
+
+# Each case repeats a fragment that never completes a match, so a
+# backtracking parser rescans the rest of the paragraph from every copy.
+ADVERSARIAL = {
+    "open brackets": "[",
+    "image openers": "![",
+    "link prefixes": "[a](",
+    "strict urls": "![a](b",
+    "bold markers": "**",
+    "italic markers": "_ ",
+    "mixed": "[`(*",
+}
+
+# Doubling the input of a linear parser doubles the time; allow generous
+# headroom for noise while still catching quadratic behavior (4x).
+MAX_DOUBLING_RATIO = 3.0
+
+def parse(text):
+    text_to_textnodes(text)
+    extract_markdown_links(text)
+    extract_markdown_images(text)
+
+def best_of(runs, fn, arg):
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn(arg)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def measure(fragment, sizes, runs=5):
+    return [(size, best_of(runs, parse, fragment * size)) for size in sizes]
+
+def main():
+    sizes = [2000 * 2 ** i for i in range(5)]
+    failed = False
+    for name, fragment in ADVERSARIAL.items():
+        timings = measure(fragment, sizes)
+        ratios = [later / earlier for (_, earlier), (_, later) in zip(timings, timings[1:])]
+        worst = max(ratios)
+        status = "ok" if worst <= MAX_DOUBLING_RATIO else "SUPERLINEAR"
+        failed = failed or worst > MAX_DOUBLING_RATIO
+        cells = "  ".join(f"{size}:{seconds * 1000:.2f}ms" for size, seconds in timings)
+        print(f"{name:15} {cells}  worst x{worst:.2f} {status}")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1 @@
+python3 src/loadtest.py "$@"
\ No newline at end of file
@@ -0,0 +1,103 @@
+import hashlib, os
+import urllib.error, urllib.request
+from concurrent.futures import ThreadPoolExecutor
+import buildlog, highlight
+
+# Bump whenever parsing or rendering changes output for the same input,
+# so artifacts rendered by older builds are never reused.
+PARSER_VERSION = "4"
+
+def content_hash(data) -> str:
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
+
+def cache_key(source_hash: str, template_hash: str, basepath: str, assets_hash: str = "", parser_version: str = PARSER_VERSION) -> str:
+    return content_hash("\0".join((parser_version, highlight.LEXER_VERSION, source_hash, template_hash, basepath, assets_hash)))
+
+class LocalDirBackend:
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], key)
+
+    def get(self, key: str):
+        try:
+            with open(self._path(key), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, key: str, data: bytes):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+class HTTPBackend:
+    def __init__(self, base_url: str, timeout: float = 10.0):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+
+    def get(self, key: str):
+        try:
+            with urllib.request.urlopen(f"{self.base_url}/{key}", timeout=self.timeout) as response:
+                return response.read()
+        except urllib.error.HTTPError as e:
+            if e.code == 404:
+                return None
+            raise
+
+    def put(self, key: str, data: bytes):
+        request = urllib.request.Request(f"{self.base_url}/{key}", data=data, method="PUT")
+        request.add_header("Content-Type", "application/octet-stream")
+        with urllib.request.urlopen(request, timeout=self.timeout):
+            pass
+
+def open_backend(location: str):
+    if location.startswith(("http://", "https://")):
+        return HTTPBackend(location)
+    return LocalDirBackend(location)
+
+class BuildCache:
+    def __init__(self, backend, workers: int = 8):
+        self.backend = backend
+        self.workers = workers
+        self.fetched = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _fetch(self, key: str):
+        try:
+            return key, self.backend.get(key)
+        except (OSError, urllib.error.URLError):
+            # A flaky cache must never fail the build; render instead.
+            return key, None
+
+    def prefetch(self, keys):
+        pending = [key for key in dict.fromkeys(keys) if key not in self.fetched]
+        if not pending:
+            return
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for key, data in pool.map(self._fetch, pending):
+                self.fetched[key] = data
+
+    def get(self, key: str):
+        if key not in self.fetched:
+            self.fetched[key] = self._fetch(key)[1]
+        data = self.fetched[key]
+        if data is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return data
+
+    def put(self, key: str, data: bytes):
+        self.fetched[key] = data
+        try:
+            self.backend.put(key, data)
+        except (OSError, urllib.error.URLError) as e:
+            buildlog.warning("build-cache", f"Build cache upload failed for {key}: {e}", key=key)
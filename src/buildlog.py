@@ -0,0 +1,233 @@
+import itertools, json, sys, threading, time
+from collections import deque
+
+DEBUG, INFO, WARNING, ERROR = 10, 20, 30, 40
+LEVELS = {"debug": DEBUG, "info": INFO, "warning": WARNING, "error": ERROR}
+LEVEL_NAMES = {level: name for name, level in LEVELS.items()}
+
+# Redrawing the progress line more often than this only costs terminal I/O.
+_PROGRESS_INTERVAL = 0.1
+
+def format_duration(seconds: float) -> str:
+    seconds = int(seconds + 0.5)
+    if seconds < 60:
+        return f"{seconds}s"
+    if seconds < 3600:
+        return f"{seconds // 60}m{seconds % 60:02d}s"
+    return f"{seconds // 3600}h{seconds // 60 % 60:02d}m"
+
+class Progress:
+    def __init__(self, label: str, total: int = None):
+        self.label = label
+        self.total = total
+        self.started = time.perf_counter()
+        self.done = 0
+        self._counter = itertools.count(1)
+
+    def advance(self) -> int:
+        # next() on a count is atomic, so workers never wait on each other.
+        self.done = next(self._counter)
+        return self.done
+
+    def line(self, now: float = None) -> str:
+        elapsed = (now or time.perf_counter()) - self.started
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        if self.total:
+            line = f"{self.label}: {self.done}/{self.total} ({self.done * 100 // self.total}%, {rate:.0f}/s"
+            if rate and self.done < self.total:
+                line += f", ETA {format_duration((self.total - self.done) / rate)}"
+            return line + ")"
+        return f"{self.label}: {self.done} ({rate:.0f}/s)"
+
+def _take(buffer: deque) -> list:
+    # popleft is atomic, so when the owner and a flush from another thread
+    # drain the same buffer, every record is taken exactly once.
+    records = []
+    try:
+        for _ in range(len(buffer)):
+            records.append(buffer.popleft())
+    except IndexError:
+        pass
+    return records
+
+class BuildLog:
+    def __init__(self, level: int = INFO, json_path: str = None, progress: bool = None, text: bool = True, buffer_records: int = 256):
+        self.level = level
+        self.json_path = json_path
+        self.text = text
+        self.progress = progress
+        self.buffer_records = buffer_records
+        self._json = None
+        if json_path == "-":
+            self._json = sys.stdout
+        elif json_path:
+            self._json = open(json_path, "a", encoding="utf-8")
+        self._local = threading.local()
+        self._buffers = []
+        self._ready = []
+        self._lock = threading.Lock()
+        self._output_lock = threading.Lock()
+        self._task = None
+        self._drawn = 0
+        self._drawn_at = 0.0
+
+    @property
+    def stream(self):
+        # Looked up on every write so redirect_stdout (the build daemon)
+        # still captures the output.
+        return sys.stdout
+
+    def _show_progress(self) -> bool:
+        if self.progress is not None:
+            return self.progress and self.text
+        return self.text and self.stream.isatty()
+
+    def _buffer(self) -> deque:
+        # Each thread appends to its own buffer without taking a lock.
+        buffer = getattr(self._local, "buffer", None)
+        if buffer is None:
+            buffer = self._local.buffer = deque()
+            with self._lock:
+                self._buffers.append(buffer)
+        return buffer
+
+    def log(self, level: int, event: str, message: str, **fields):
+        if level < self.level:
+            return
+        buffer = self._buffer()
+        buffer.append((time.time(), level, event, message, fields))
+        # Per-file messages are batched; anything more important is shown
+        # as soon as it happens.
+        if level >= INFO or len(buffer) >= self.buffer_records:
+            self._hand_over([buffer])
+
+    def _hand_over(self, buffers: list, wait: bool = False):
+        batches = [records for records in map(_take, buffers) if records]
+        if batches:
+            with self._lock:
+                self._ready.extend(batches)
+        # One thread writes at a time. A worker that finds the output busy
+        # leaves its batch to the writer instead of waiting for it.
+        while self._ready:
+            if not self._output_lock.acquire(blocking=wait):
+                return
+            try:
+                while True:
+                    with self._lock:
+                        batches, self._ready = self._ready, []
+                    if not batches:
+                        break
+                    for records in batches:
+                        self._write(records)
+            finally:
+                self._output_lock.release()
+
+    def _write(self, records: list):
+        # Called with the output lock held.
+        text = "".join(f"{message}\n" for _, _, _, message, _ in records) if self.text else ""
+        lines = ""
+        if self._json is not None:
+            lines = "".join(
+                json.dumps({"time": round(created, 3), "level": LEVEL_NAMES.get(level, str(level)), "event": event, "message": message, **fields}) + "\n"
+                for created, level, event, message, fields in records
+            )
+        self._clear_progress()
+        if text:
+            self.stream.write(text)
+        if lines:
+            self._json.write(lines)
+        self._draw_progress()
+
+    def flush(self):
+        with self._lock:
+            buffers = list(self._buffers)
+        self._hand_over(buffers, wait=True)
+        with self._output_lock:
+            if self._json is not None:
+                self._json.flush()
+            self.stream.flush()
+
+    def start(self, label: str, total: int = None) -> Progress:
+        self.flush()
+        self._task = Progress(label, total)
+        return self._task
+
+    def advance(self):
+        task = self._task
+        if task is None:
+            return
+        task.advance()
+        now = time.perf_counter()
+        if now - self._drawn_at < _PROGRESS_INTERVAL or not self._show_progress():
+            return
+        # A worker that finds the line being drawn just skips this redraw.
+        if self._output_lock.acquire(blocking=False):
+            try:
+                self._draw_progress(now)
+            finally:
+                self._output_lock.release()
+
+    def finish(self, event: str, message: str, **fields):
+        task = self._task
+        self.flush()
+        with self._output_lock:
+            self._clear_progress()
+            self._task = None
+        if task is not None:
+            elapsed = time.perf_counter() - task.started
+            fields = {"count": task.done, "seconds": round(elapsed, 3), **fields}
+            message = f"{message}: {task.done} in {elapsed:.2f}s"
+        self.log(INFO, event, message, **fields)
+
+    def _draw_progress(self, now: float = None):
+        if self._task is None or not self._show_progress():
+            return
+        self._drawn_at = now or time.perf_counter()
+        line = self._task.line(self._drawn_at)
+        self.stream.write("\r" + line.ljust(self._drawn))
+        self.stream.flush()
+        self._drawn = len(line)
+
+    def _clear_progress(self):
+        if self._drawn:
+            self.stream.write("\r" + " " * self._drawn + "\r")
+            self._drawn = 0
+
+    def close(self):
+        self.flush()
+        if self._json is not None and self._json is not sys.stdout:
+            self._json.close()
+        self._json = None
+
+_log = BuildLog()
+
+def configure_log(level: int = INFO, json_path: str = None, progress: bool = None):
+    global _log
+    _log.close()
+    # JSON on stdout replaces the human-readable lines.
+    _log = BuildLog(level, json_path, progress, text=json_path != "-")
+    return _log
+
+def get_log() -> BuildLog:
+    return _log
+
+def debug(event: str, message: str, **fields):
+    _log.log(DEBUG, event, message, **fields)
+
+def info(event: str, message: str, **fields):
+    _log.log(INFO, event, message, **fields)
+
+def warning(event: str, message: str, **fields):
+    _log.log(WARNING, event, message, **fields)
+
+def error(event: str, message: str, **fields):
+    _log.log(ERROR, event, message, **fields)
+
+def start(label: str, total: int = None) -> Progress:
+    return _log.start(label, total)
+
+def advance():
+    _log.advance()
+
+def finish(event: str, message: str, **fields):
+    _log.finish(event, message, **fields)
@@ -0,0 +1,56 @@
+import gzip, json, posixpath, tarfile, zipfile
+from outputs import archive_format
+
+JSONL_SUFFIXES = (".jsonl", ".ndjson", ".jsonl.gz", ".ndjson.gz")
+
+def bundle_format(path: str) -> str:
+    if path.endswith(JSONL_SUFFIXES):
+        return "jsonl"
+    fmt = archive_format(path)
+    if fmt is None:
+        raise ValueError(f"Cannot infer bundle format from {path!r}; use .jsonl, .tar, .tar.gz, .tar.bz2, .tar.xz or .zip")
+    return fmt[0]
+
+def page_path(path: str) -> str:
+    # Bundle paths become output paths, so nothing may escape the site.
+    normalized = posixpath.normpath(path.replace("\\", "/"))
+    if not path or normalized.startswith(("/", "../")) or normalized in (".", ".."):
+        raise ValueError(f"Invalid page path in bundle: {path!r}")
+    return posixpath.splitext(normalized)[0] + ".html"
+
+def _read_jsonl(path: str):
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+                yield entry["path"], entry["content"]
+            except (ValueError, KeyError, TypeError) as e:
+                raise ValueError(f"{path}:{line_number}: expected an object with path and content ({e})") from None
+
+def _read_tar(path: str):
+    # Stream mode reads members in archive order without seeking, so
+    # compressed tarballs are decompressed exactly once.
+    with tarfile.open(path, mode="r|*") as archive:
+        for member in archive:
+            if member.isfile() and member.name.endswith(".md"):
+                yield member.name, archive.extractfile(member).read().decode("utf-8")
+
+def _read_zip(path: str):
+    with zipfile.ZipFile(path) as archive:
+        for info in archive.infolist():
+            if not info.is_dir() and info.filename.endswith(".md"):
+                yield info.filename, archive.read(info).decode("utf-8")
+
+_READERS = {"jsonl": _read_jsonl, "tar": _read_tar, "zip": _read_zip}
+
+def read_bundle(path: str):
+    seen = set()
+    for name, markdown_content in _READERS[bundle_format(path)](path):
+        relative_html_path = page_path(name)
+        if relative_html_path in seen:
+            raise ValueError(f"Duplicate page in bundle: {name}")
+        seen.add(relative_html_path)
+        yield f"{path}:{name}", relative_html_path, markdown_content
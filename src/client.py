@@ -0,0 +1,42 @@
+# Deliberately imports only what it needs to talk to the daemon so that a
+# warm build costs little more than interpreter start.
+import json, os, socket, sys
+
+DEFAULT_SOCKET = os.path.join(".cache", "build.sock")
+
+def socket_path() -> str:
+    return os.environ.get("SSG_SOCKET", DEFAULT_SOCKET)
+
+def request(message: dict, path: str = None) -> int:
+    path = path or socket_path()
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(path)
+        sock.sendall(json.dumps(message).encode("utf-8") + b"\n")
+        with sock.makefile("r", encoding="utf-8") as stream:
+            for line in stream:
+                reply = json.loads(line)
+                if "output" in reply:
+                    sys.stdout.write(reply["output"])
+                if "exit" in reply:
+                    return reply["exit"]
+    raise ConnectionError("Build daemon closed the connection without a status")
+
+def main(argv=None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["--shutdown"]:
+        try:
+            return request({"command": "shutdown"})
+        except (FileNotFoundError, ConnectionRefusedError):
+            print("no daemon running")
+            return 1
+
+    try:
+        return request({"command": "build", "argv": argv, "cwd": os.getcwd()})
+    except (FileNotFoundError, ConnectionRefusedError):
+        # No daemon running: behave exactly like `python3 src/main.py`.
+        import main as build
+        build.main(argv)
+        return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+import hashlib, os, posixpath, re
+from vfs import DISK
+
+# Strings are matched alongside comments so a "/*" inside quotes is not
+# taken for a comment, and so their contents are never minified.
+_STRING_OR_COMMENT = re.compile(r"""("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')|/\*[\s\S]*?\*/""")
+_PLACEHOLDER = re.compile(r"\0(\d+)\0")
+_WHITESPACE = re.compile(r"\s+")
+_AROUND_PUNCTUATION = re.compile(r"\s*([{};,>])\s*")
+# Whitespace before ":" can be a descendant combinator ("a :hover").
+_AFTER_COLON = re.compile(r":\s+")
+_STYLESHEET_LINK = re.compile(r"<link\b[^>]*>", re.IGNORECASE)
+_ATTR = re.compile(r'([\w-]+)\s*=\s*"([^"]*)"')
+_URL = re.compile(r"""url\(\s*(['"]?)([^'")\s]+)\1\s*\)""")
+# Schemes (data:, https:), protocol-relative and fragment-only URLs do not
+# depend on where the stylesheet lives.
+_UNREBASED_URL = re.compile(r"(?:[a-zA-Z][a-zA-Z0-9+.-]*:|//|#)")
+
+def minify_css(css: str) -> str:
+    strings = []
+
+    def hide(match):
+        if match.group(1) is None:
+            return ""
+        strings.append(match.group(1))
+        return f"\0{len(strings) - 1}\0"
+
+    css = _STRING_OR_COMMENT.sub(hide, css)
+    css = _WHITESPACE.sub(" ", css)
+    css = _AROUND_PUNCTUATION.sub(r"\1", css)
+    css = _AFTER_COLON.sub(":", css)
+    css = css.replace(";}", "}").strip()
+    return _PLACEHOLDER.sub(lambda m: strings[int(m.group(1))], css)
+
+def rebase_css_urls(css: str, href: str, basepath: str = "/") -> str:
+    # Relative URLs resolve against the stylesheet; once inlined they would
+    # resolve against each page instead, so every URL is made absolute.
+    def replace(match):
+        quote, url = match.groups()
+        if _UNREBASED_URL.match(url):
+            return match.group(0)
+        if not url.startswith("/"):
+            url = posixpath.normpath(posixpath.join(posixpath.dirname(href), url))
+        return f"url({quote}{basepath}{url.lstrip('/')}{quote})"
+
+    return _URL.sub(replace, css)
+
+class InlineCache:
+    def __init__(self):
+        self.minified = {}
+
+    def get(self, path: str, fs=DISK) -> str:
+        data = fs.read_bytes(path)
+        key = hashlib.sha256(data).hexdigest()
+        css = self.minified.get(key)
+        if css is None:
+            css = minify_css(data.decode("utf-8"))
+            self.minified[key] = css
+        return css
+
+_cache = InlineCache()
+
+def _stylesheet_href(tag: str):
+    attrs = dict(_ATTR.findall(tag))
+    if attrs.get("rel", "").lower() != "stylesheet":
+        return None
+    href = attrs.get("href", "")
+    if not href.startswith("/") or href.startswith("//"):
+        return None
+    return href
+
+def inline_stylesheets(template: str, static_dir: str, threshold: int, basepath: str = "/", fs=DISK) -> str:
+    def replace(match):
+        tag = match.group(0)
+        href = _stylesheet_href(tag)
+        if href is None:
+            return tag
+        path = os.path.join(static_dir, href.lstrip("/"))
+        if not fs.isfile(path):
+            return tag
+
+        css = _cache.get(path, fs)
+        if len(css.encode("utf-8")) > threshold:
+            return f'<link rel="preload" href="{href}" as="style" />\n    {tag}'
+        # Page URLs are rebased by rewriting href/src attributes, which
+        # would miss url() references once the CSS lives in the page.
+        css = rebase_css_urls(css, href, basepath)
+        return f"<style>{css}</style>"
+
+    return _STYLESHEET_LINK.sub(replace, template)
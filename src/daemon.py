@@ -0,0 +1,107 @@
+import argparse, io, json, os, re, socket, socketserver, subprocess, sys, threading, time
+from contextlib import redirect_stdout, redirect_stderr
+
+import main as build
+from client import socket_path
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def measure_import_time(module: str = "main") -> float:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=SRC_DIR, capture_output=True, text=True, check=True,
+    )
+    # Lines look like "import time: self [us] | cumulative | name".
+    for line in result.stderr.splitlines():
+        match = re.match(r"import time:\s+\d+\s+\|\s+(\d+)\s+\|\s?(\S+)$", line)
+        if match and match.group(2) == module:
+            return int(match.group(1)) / 1000
+    raise ValueError(f"No import timing reported for {module}")
+
+def check_import_budget(budget_ms: float, module: str = "main") -> float:
+    elapsed_ms = measure_import_time(module)
+    if elapsed_ms > budget_ms:
+        raise RuntimeError(
+            f"Importing {module} took {elapsed_ms:.1f} ms, over the {budget_ms:.1f} ms budget"
+        )
+    return elapsed_ms
+
+class _StreamWriter(io.TextIOBase):
+    def __init__(self, wfile):
+        self.wfile = wfile
+
+    def write(self, text):
+        if text:
+            self.wfile.write(json.dumps({"output": text}).encode("utf-8") + b"\n")
+        return len(text)
+
+class BuildHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        line = self.rfile.readline()
+        if not line:
+            return
+        message = json.loads(line)
+        if message.get("command") == "shutdown":
+            self.send({"exit": 0})
+            # shutdown() waits for serve_forever() to return, so it cannot
+            # run on the thread that is serving this request.
+            threading.Thread(target=self.server.shutdown).start()
+            return
+
+        writer = _StreamWriter(self.wfile)
+        started = time.perf_counter()
+        previous_cwd = os.getcwd()
+        status = 0
+        try:
+            os.chdir(message.get("cwd", previous_cwd))
+            with redirect_stdout(writer), redirect_stderr(writer):
+                build.main(message.get("argv", []))
+        except SystemExit as e:
+            status = e.code if isinstance(e.code, int) else 1
+        except Exception as e:
+            writer.write(f"Build failed: {e}\n")
+            status = 1
+        finally:
+            os.chdir(previous_cwd)
+        elapsed = time.perf_counter() - started
+        print(f"Build finished in {elapsed * 1000:.0f} ms (exit {status})")
+        self.send({"exit": status})
+
+    def send(self, reply: dict):
+        self.wfile.write(json.dumps(reply).encode("utf-8") + b"\n")
+
+def daemon_running(path: str) -> bool:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(path)
+            return True
+        except OSError:
+            return False
+
+def serve(path: str):
+    if os.path.exists(path):
+        # Only a socket left behind by a daemon that died is taken over.
+        if daemon_running(path):
+            raise SystemExit(f"serve-build is already running on {path}")
+        os.remove(path)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with socketserver.UnixStreamServer(path, BuildHandler) as server:
+        print(f"serve-build listening on {path}")
+        try:
+            server.serve_forever(poll_interval=0.2)
+        finally:
+            os.remove(path)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Keep a warm build process resident.")
+    parser.add_argument("--socket", default=socket_path())
+    parser.add_argument("--import-budget-ms", type=float, default=250.0,
+                        help="fail startup if importing the build modules exceeds this")
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+
+    elapsed_ms = check_import_budget(args.import_budget_ms)
+    print(f"Import time {elapsed_ms:.1f} ms (budget {args.import_budget_ms:.1f} ms)")
+    serve(args.socket)
+
+if __name__ == "__main__":
+    main()
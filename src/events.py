@@ -0,0 +1,56 @@
+from textnode import EventType
+from htmlnode import escape_text, props_to_html
+
+BLOCK_TAGS = {"p", "h1", "h2", "h3", "h4", "h5", "h6", "pre", "blockquote", "li"}
+
+def render_html(events) -> str:
+    parts = []
+    append = parts.append
+    for event in events:
+        kind = event[0]
+        if kind is EventType.TEXT:
+            append(escape_text(event[1]))
+        elif kind is EventType.SPAN:
+            _, tag, text, props = event
+            append(f"<{tag}{props_to_html(props)}>{escape_text(text)}</{tag}>")
+        elif kind is EventType.OPEN:
+            append(f"<{event[1]}{props_to_html(event[2])}>")
+        else:
+            append(f"</{event[1]}>")
+    return "".join(parts)
+
+def render_text(events) -> str:
+    parts = []
+    append = parts.append
+    for event in events:
+        kind = event[0]
+        if kind is EventType.TEXT:
+            append(event[1])
+        elif kind is EventType.SPAN:
+            append(event[2])
+        elif kind is EventType.CLOSE and event[1] in BLOCK_TAGS:
+            append("\n")
+    return "".join(parts)
+
+def count_words(events) -> int:
+    count = 0
+    in_word = False
+    for event in events:
+        kind = event[0]
+        if kind is EventType.TEXT:
+            text = event[1]
+        elif kind is EventType.SPAN:
+            text = event[2]
+        else:
+            in_word = False
+            continue
+        if not text:
+            continue
+
+        words = text.split()
+        count += len(words)
+        # A word split across inline events ("**bo**ld") is counted once.
+        if words and in_word and not text[0].isspace():
+            count -= 1
+        in_word = not text[-1].isspace()
+    return count
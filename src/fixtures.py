@@ -0,0 +1,28 @@
+import os
+from vfs import MemoryFS
+import buildlog
+
+# Helpers shared by the tests that build sites on disk or in memory.
+
+TEMPLATE = "<html><head><title>{{ Title }}</title></head><body>{{ Content }}</body></html>"
+STYLED_TEMPLATE = '<title>{{ Title }}</title><link href="/index.css" rel="stylesheet" />{{ Content }}'
+
+def write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(text)
+
+def read(path):
+    with open(path) as f:
+        return f.read()
+
+def memory_site(files, template=TEMPLATE):
+    return MemoryFS({"template.html": template, **files})
+
+# Builds report their progress at INFO. Test modules that run builds
+# import these so unittest keeps the build log down to errors.
+def setUpModule():
+    buildlog.configure_log(buildlog.ERROR)
+
+def tearDownModule():
+    buildlog.configure_log()
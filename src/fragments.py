@@ -0,0 +1,21 @@
+import json, os
+from prefetch import inject_head
+
+# Bump when the fragment layout changes so cached fragments are not reused.
+FRAGMENT_VERSION = "fragment-1"
+NAV_SCRIPT_PATH = "nav.js"
+
+_NAV_SCRIPT_SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "nav.js")
+
+def fragment_path(relative_html_path: str) -> str:
+    return os.path.splitext(relative_html_path)[0] + ".frag.json"
+
+def render_fragment(title: str, content: str) -> str:
+    return json.dumps({"title": title, "content": content}, ensure_ascii=False, separators=(",", ":"))
+
+def nav_script() -> bytes:
+    with open(_NAV_SCRIPT_SOURCE, "rb") as f:
+        return f.read()
+
+def inject_nav_script(template: str) -> str:
+    return inject_head(template, f'<script src="/{NAV_SCRIPT_PATH}" defer></script>')
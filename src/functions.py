@@ -1,6 +1,7 @@
 import re
-from textnode import TextType, TextNode, BlockType
+from textnode import TextType, TextNode, BlockType, EventType
 from htmlnode import LeafNode, ParentNode
+from highlight import highlight
 
 def text_node_to_html_node(text_node):
     if text_node.text_type == TextType.TEXT:
@@ -31,9 +32,23 @@ def text_node_to_html_node(text_node):
     else:
         raise ValueError(f"Unknown TextType: {text_node.text_type}")
     
+def delimited_segments(text, delimiter):
+    # Alternating plain and enclosed segments, or None when the delimiter
+    # does not pair up or encloses another kind of markup.
+    segments = text.split(delimiter)
+    if len(segments) < 3 or len(segments) % 2 == 0:
+        return None
+
+    if delimiter != "`":
+        # One substring scan per delimiter over the enclosed text keeps
+        # this linear in the length of the text.
+        enclosed = "\0".join(segments[1::2])
+        if any(other in enclosed for other in ("**", "_", "`") if other != delimiter):
+            return None
+    return segments
+
 def split_nodes_delimiter(old_nodes, delimiter, text_type):
     new_nodes = []
-    all_delimiters = {"**", "_", "`"}
 
     for node in old_nodes:
         if node.text_type != TextType.TEXT:
@@ -43,20 +58,11 @@ def split_nodes_delimiter(old_nodes, delimiter, text_type):
         if not node.text:
             continue
 
-        segments = node.text.split(delimiter)
-        if len(segments) < 3 or len(segments) % 2 == 0:
+        segments = delimited_segments(node.text, delimiter)
+        if segments is None:
             new_nodes.append(node)
             continue
 
-        if delimiter != "`":
-            has_nested = any(
-                any(other in segments[i] for other in all_delimiters if other != delimiter)
-                for i in range(1, len(segments), 2)
-            )
-            if has_nested:
-                new_nodes.append(node)
-                continue
-
         for i, segment in enumerate(segments):
             if segment == "" and i % 2 == 0:
                 continue
@@ -67,44 +73,65 @@ def split_nodes_delimiter(old_nodes, delimiter, text_type):
 
     return new_nodes
 
-def extract_markdown_images(text):
-    pattern = r'!\[([^\]]+)\]\(([^)]+)\)'
-    matches = re.findall(pattern, text)
-    return matches
-
-def extract_markdown_links(text):
-    pattern = r'(?<!!)\[([^\]]+)\]\(([^)]+)\)'
-    matches = re.findall(pattern, text)
-    return matches
-
-def split_nodes_image(old_nodes):
-    new_nodes = []
-    pattern = r"!\[([^\]]+)\]\(([^()\s]+)\)"
-
-    for node in old_nodes:
-        if node.text_type != TextType.TEXT:
-            new_nodes.append(node)
+_STRICT_URL = re.compile(r"[^()\s]*")
+
+def iter_bracket_matches(text, image, strict_url=False):
+    # Linear-time equivalent of finditer() over
+    #   image:  !\[([^\]]+)\]\(URL\)
+    #   link:   (?<!!)\[([^\]]+)\]\(URL\)
+    # with URL [^)]+, or [^()\s]+ when strict_url. The regexes rescan to the
+    # end of the text from every unmatched "[", which is quadratic. Every
+    # "[" before the next "]" shares that "]", so they succeed or fail
+    # together and the scan can always resume after it.
+    pos = 0
+    length = len(text)
+    while True:
+        open_index = text.find("[", pos)
+        if open_index == -1:
+            return
+        close_index = text.find("]", open_index + 1)
+        if close_index == -1:
+            return
+
+        start = -1
+        candidate = open_index
+        while candidate != -1 and candidate < close_index - 1:
+            preceded_by_bang = candidate > 0 and text[candidate - 1] == "!"
+            if image and preceded_by_bang and candidate - 1 >= pos:
+                start = candidate - 1
+                break
+            if not image and not preceded_by_bang:
+                start = candidate
+                break
+            candidate = text.find("[", candidate + 1, close_index)
+
+        pos = close_index + 1
+        if start == -1 or pos >= length or text[pos] != "(":
             continue
 
-        last_index = 0
-        for match in re.finditer(pattern, node.text):
-            alt, url = match.group(1), match.group(2)
-            start, end = match.span()
-
-            if start > last_index:
-                new_nodes.append(TextNode(node.text[last_index:start], TextType.TEXT))
-            new_nodes.append(TextNode(alt, TextType.IMAGE, url))
+        url_start = pos + 1
+        if strict_url:
+            url_end = _STRICT_URL.match(text, url_start).end()
+            if url_end == url_start or url_end >= length or text[url_end] != ")":
+                continue
+        else:
+            url_end = text.find(")", url_start)
+            if url_end == -1:
+                return
+            if url_end == url_start:
+                continue
 
-            last_index = end
+        yield start, url_end + 1, text[candidate + 1:close_index], text[url_start:url_end]
+        pos = url_end + 1
 
-        if last_index < len(node.text):
-            new_nodes.append(TextNode(node.text[last_index:], TextType.TEXT))
+def extract_markdown_images(text):
+    return [(alt, url) for _, _, alt, url in iter_bracket_matches(text, image=True)]
 
-    return new_nodes
+def extract_markdown_links(text):
+    return [(alt, url) for _, _, alt, url in iter_bracket_matches(text, image=False)]
 
-def split_nodes_link(old_nodes):
+def _split_bracket_nodes(old_nodes, image, text_type, strict_url):
     new_nodes = []
-    pattern = r"(?<!!)\[([^\]]+)\]\(([^)]+)\)"
 
     for node in old_nodes:
         if node.text_type != TextType.TEXT:
@@ -112,13 +139,10 @@ def split_nodes_link(old_nodes):
             continue
 
         last_index = 0
-        for match in re.finditer(pattern, node.text):
-            text, url = match.group(1), match.group(2)
-            start, end = match.span()
-
+        for start, end, text, url in iter_bracket_matches(node.text, image, strict_url):
             if start > last_index:
                 new_nodes.append(TextNode(node.text[last_index:start], TextType.TEXT))
-            new_nodes.append(TextNode(text, TextType.LINK, url))
+            new_nodes.append(TextNode(text, text_type, url))
 
             last_index = end
 
@@ -127,10 +151,15 @@ def split_nodes_link(old_nodes):
 
     return new_nodes
 
+def split_nodes_image(old_nodes):
+    return _split_bracket_nodes(old_nodes, True, TextType.IMAGE, strict_url=True)
+
+def split_nodes_link(old_nodes):
+    return _split_bracket_nodes(old_nodes, False, TextType.LINK, strict_url=False)
+
 def text_to_textnodes(text):
-    if "**" in text and "_" in text:
-        if "_**" in text or "**_" in text or "_**" in text[::-1] or "**_" in text[::-1]:
-            return [TextNode(text, TextType.TEXT)]
+    if "_**" in text or "**_" in text:
+        return [TextNode(text, TextType.TEXT)]
 
     nodes = [TextNode(text, TextType.TEXT)]
 
@@ -169,57 +198,170 @@ def block_to_block_type(block: str) -> BlockType:
         return BlockType.ORDERED_LIST
     return BlockType.PARAGRAPH
 
-def text_to_children(text):
-    return [text_node_to_html_node(node) for node in text_to_textnodes(text)]
+def split_code_fence(block):
+    body = block.strip()[3:-3]
+    info, newline, rest = body.partition("\n")
+    if newline and info.strip():
+        return info.split()[0], rest
+    return None, body.lstrip("\n")
 
-def block_to_html_node(block):
+# The event splitters mirror the TextNode ones above but stream tuples,
+# so page rendering never builds TextNode lists.
+
+def split_events_delimiter(events, delimiter, tag):
+    for event in events:
+        if event[0] is not EventType.TEXT:
+            yield event
+            continue
+
+        text = event[1]
+        if not text:
+            continue
+
+        segments = delimited_segments(text, delimiter)
+        if segments is None:
+            yield event
+            continue
+
+        for i, segment in enumerate(segments):
+            if i % 2 == 1:
+                yield (EventType.SPAN, tag, segment, None)
+            elif segment:
+                yield (EventType.TEXT, segment)
+
+def _split_bracket_events(events, image, strict_url):
+    for event in events:
+        if event[0] is not EventType.TEXT:
+            yield event
+            continue
+
+        text = event[1]
+        last_index = 0
+        for start, end, label, url in iter_bracket_matches(text, image, strict_url):
+            if start > last_index:
+                yield (EventType.TEXT, text[last_index:start])
+            if image:
+                yield (EventType.SPAN, "img", "", {"src": url, "alt": label})
+            else:
+                yield (EventType.SPAN, "a", label, {"href": url})
+            last_index = end
+
+        if last_index < len(text):
+            yield (EventType.TEXT, text[last_index:])
+
+def split_events_image(events):
+    return _split_bracket_events(events, True, strict_url=True)
+
+def split_events_link(events):
+    return _split_bracket_events(events, False, strict_url=False)
+
+def text_to_events(text):
+    if "_**" in text or "**_" in text:
+        yield (EventType.TEXT, text)
+        return
+
+    events = [(EventType.TEXT, text)]
+
+    events = split_events_image(events)
+    events = split_events_link(events)
+
+    events = split_events_delimiter(events, "**", "b")
+    events = split_events_delimiter(events, "_", "i")
+    events = split_events_delimiter(events, "`", "code")
+
+    yield from events
+
+def block_to_events(block):
     block_type = block_to_block_type(block)
 
     if block_type == BlockType.PARAGRAPH:
         normalized_text = " ".join(block.splitlines()).strip()
-        children = text_to_children(normalized_text)
-        return ParentNode("p", children)
-    
+        yield (EventType.OPEN, "p", None)
+        yield from text_to_events(normalized_text)
+        yield (EventType.CLOSE, "p")
+
     elif block_type == BlockType.HEADING:
         heading_level = len(re.match(r"^(#+)", block).group(1))
         text = block[heading_level+1:].strip()
-        children = text_to_children(text)
-        return ParentNode(f"h{heading_level}", children)
+        yield (EventType.OPEN, f"h{heading_level}", None)
+        yield from text_to_events(text)
+        yield (EventType.CLOSE, f"h{heading_level}")
 
     elif block_type == BlockType.CODE:
-        inner = block.strip()[3:-3].lstrip("\n")
-        text_node = TextNode(inner, TextType.TEXT)
-        html_node = text_node_to_html_node(text_node)
-        return ParentNode("pre", [ParentNode("code", [html_node])])
+        lang, inner = split_code_fence(block)
+        yield (EventType.OPEN, "pre", None)
+        yield (EventType.OPEN, "code", {"class": f"language-{lang}"} if lang else None)
+        tokens = highlight(inner, lang)
+        if tokens is None:
+            yield (EventType.TEXT, inner)
+        else:
+            for cls, text in tokens:
+                if cls is None:
+                    yield (EventType.TEXT, text)
+                else:
+                    yield (EventType.SPAN, "span", text, {"class": f"tok-{cls}"})
+        yield (EventType.CLOSE, "code")
+        yield (EventType.CLOSE, "pre")
 
     elif block_type == BlockType.QUOTE:
         lines = [line[1:].strip() for line in block.split("\n")]
         inner_text = " ".join(lines)
-        children = text_to_children(inner_text)
-        return ParentNode("blockquote", children)
+        yield (EventType.OPEN, "blockquote", None)
+        yield from text_to_events(inner_text)
+        yield (EventType.CLOSE, "blockquote")
 
     elif block_type == BlockType.UNORDERED_LIST:
-        items = block.split("\n")
-        li_nodes = [ParentNode("li", text_to_children(item[2:].strip())) for item in items]
-        return ParentNode("ul", li_nodes)
+        yield (EventType.OPEN, "ul", None)
+        for item in block.split("\n"):
+            yield (EventType.OPEN, "li", None)
+            yield from text_to_events(item[2:].strip())
+            yield (EventType.CLOSE, "li")
+        yield (EventType.CLOSE, "ul")
 
     elif block_type == BlockType.ORDERED_LIST:
-        items = block.split("\n")
-        li_nodes = []
-        for item in items:
+        yield (EventType.OPEN, "ol", None)
+        for item in block.split("\n"):
             dot_index = item.find(". ")
             if dot_index != -1:
-                text = item[dot_index+2:].strip()
-                li_nodes.append(ParentNode("li", text_to_children(text)))
-        return ParentNode("ol", li_nodes)
+                yield (EventType.OPEN, "li", None)
+                yield from text_to_events(item[dot_index+2:].strip())
+                yield (EventType.CLOSE, "li")
+        yield (EventType.CLOSE, "ol")
 
     else:
         raise ValueError(f"Unsupported block type: {block_type}")
 
+def markdown_to_events(markdown):
+    yield (EventType.OPEN, "div", None)
+    for block in markdown_to_blocks(markdown):
+        yield from block_to_events(block)
+    yield (EventType.CLOSE, "div")
+
+def events_to_html_node(events):
+    children_stack = [[]]
+    open_stack = []
+    for event in events:
+        kind = event[0]
+        if kind is EventType.TEXT:
+            children_stack[-1].append(LeafNode(value=event[1]))
+        elif kind is EventType.SPAN:
+            children_stack[-1].append(LeafNode(event[1], event[2], event[3]))
+        elif kind is EventType.OPEN:
+            children_stack.append([])
+            open_stack.append(event)
+        else:
+            children = children_stack.pop()
+            _, tag, props = open_stack.pop()
+            children_stack[-1].append(ParentNode(tag, children, props))
+    if open_stack:
+        raise ValueError(f"Unclosed <{open_stack[-1][1]}> in event stream")
+    return children_stack[0][0]
+
+def block_to_html_node(block):
+    return events_to_html_node(block_to_events(block))
+
 def markdown_to_html_node(markdown):
-    blocks = markdown_to_blocks(markdown)
-    block_nodes = [block_to_html_node(block) for block in blocks]
-    return ParentNode("div", block_nodes)
+    return events_to_html_node(markdown_to_events(markdown))
 
 def extract_title(markdown: str) -> str:
     for line in markdown.splitlines():
@@ -0,0 +1,174 @@
+import hashlib, json, os, re
+from collections import OrderedDict
+
+# Bump when lexer rules change so stale disk entries are ignored.
+LEXER_VERSION = "1"
+
+_PYTHON_KEYWORDS = (
+    "False None True and as assert async await break class continue def del elif else "
+    "except finally for from global if import in is lambda nonlocal not or pass raise "
+    "return try while with yield match case"
+)
+_PYTHON_BUILTINS = (
+    "print len range str int float list dict set tuple bool open isinstance enumerate "
+    "zip map filter sorted sum min max any all super object type repr"
+)
+_JS_KEYWORDS = (
+    "async await break case catch class const continue default delete do else export "
+    "extends finally for from function if import in instanceof let new of return static "
+    "super switch this throw try typeof var void while yield true false null undefined"
+)
+_BASH_KEYWORDS = "if then else elif fi for while until do done case esac function in return export local"
+_BASH_BUILTINS = "echo cd ls cat grep sed awk printf read source set unset exit test python3 pip"
+
+def _words(words):
+    return r"\b(?:" + "|".join(words.split()) + r")\b"
+
+_STRING = r'"(?:[^"\\\n]|\\.)*"|\'(?:[^\'\\\n]|\\.)*\''
+_NUMBER = r"\b\d+(?:\.\d+)?(?:[eE][+-]?\d+)?\b"
+
+_RULES = {
+    "python": [
+        ("str", r'"""[\s\S]*?"""|\'\'\'[\s\S]*?\'\'\'|[rbfu]?(?:' + _STRING + ")"),
+        ("com", r"#[^\n]*"),
+        ("kw", _words(_PYTHON_KEYWORDS)),
+        ("bi", _words(_PYTHON_BUILTINS)),
+        ("num", _NUMBER),
+    ],
+    "javascript": [
+        ("str", _STRING + r"|`(?:[^`\\]|\\.)*`"),
+        ("com", r"//[^\n]*|/\*[\s\S]*?\*/"),
+        ("kw", _words(_JS_KEYWORDS)),
+        ("num", _NUMBER),
+    ],
+    "bash": [
+        ("str", _STRING),
+        ("com", r"(?<![\w$])#[^\n]*"),
+        ("kw", _words(_BASH_KEYWORDS)),
+        ("bi", _words(_BASH_BUILTINS)),
+        ("var", r"\$\{?\w+\}?"),
+        ("num", _NUMBER),
+    ],
+    "json": [
+        ("str", r'"(?:[^"\\\n]|\\.)*"'),
+        ("kw", r"\b(?:true|false|null)\b"),
+        ("num", r"-?" + _NUMBER),
+    ],
+}
+
+_ALIASES = {
+    "py": "python",
+    "python3": "python",
+    "js": "javascript",
+    "node": "javascript",
+    "sh": "bash",
+    "shell": "bash",
+    "zsh": "bash",
+}
+
+_LEXERS = {
+    name: re.compile("|".join(f"(?P<{cls}>{pattern})" for cls, pattern in rules))
+    for name, rules in _RULES.items()
+}
+
+def resolve_language(lang):
+    if not lang:
+        return None
+    lang = lang.lower()
+    lang = _ALIASES.get(lang, lang)
+    return lang if lang in _LEXERS else None
+
+def tokenize(code: str, lang: str) -> list:
+    lexer = _LEXERS[lang]
+    tokens = []
+    last_index = 0
+    for match in lexer.finditer(code):
+        start, end = match.span()
+        if start == end:
+            continue
+        if start > last_index:
+            tokens.append((None, code[last_index:start]))
+        tokens.append((match.lastgroup, code[start:end]))
+        last_index = end
+    if last_index < len(code):
+        tokens.append((None, code[last_index:]))
+    return tokens
+
+class HighlightCache:
+    def __init__(self, max_entries: int = 1024, cache_dir: str = None):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, code: str, lang: str) -> str:
+        digest = hashlib.sha256()
+        for part in (LEXER_VERSION, lang, code):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def _load(self, key: str):
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._disk_path(key), "r") as f:
+                return [tuple(token) for token in json.load(f)]
+        except (OSError, ValueError):
+            return None
+
+    def _store(self, key: str, tokens: list):
+        if not self.cache_dir:
+            return
+        path = self._disk_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(tokens, f)
+        os.replace(tmp_path, path)
+
+    def _remember(self, key: str, tokens: list):
+        self.entries[key] = tokens
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def get(self, code: str, lang: str) -> list:
+        key = self.key(code, lang)
+        tokens = self.entries.get(key)
+        if tokens is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return tokens
+
+        tokens = self._load(key)
+        if tokens is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+            tokens = tokenize(code, lang)
+            self._store(key, tokens)
+        self._remember(key, tokens)
+        return tokens
+
+_cache = HighlightCache()
+
+def configure_cache(cache_dir: str = None, max_entries: int = 1024):
+    global _cache
+    if _cache.cache_dir == cache_dir and _cache.max_entries == max_entries:
+        # Keep warm entries when a long-lived process rebuilds.
+        return _cache
+    _cache = HighlightCache(max_entries=max_entries, cache_dir=cache_dir)
+    return _cache
+
+def get_cache() -> HighlightCache:
+    return _cache
+
+def highlight(code: str, lang: str):
+    lang = resolve_language(lang)
+    if lang is None:
+        return None
+    return _cache.get(code, lang)
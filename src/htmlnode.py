@@ -1,3 +1,32 @@
+_TEXT_ESCAPES = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;"})
+_ATTR_ESCAPES = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;"})
+
+# Only "&" and "<" can change the meaning of text, and only "&" and '"' of a
+# double-quoted attribute, so the fast checks look for just those; when a
+# string does need escaping, translate() also escapes ">" for good measure.
+# Substring checks are far cheaper than a regex search or translate() on the
+# common case of strings with nothing to escape.
+
+def escape_text(text):
+    if "<" in text or "&" in text:
+        return text.translate(_TEXT_ESCAPES)
+    return text
+
+def escape_attr(value):
+    if not isinstance(value, str):
+        value = str(value)
+    if '"' in value or "&" in value:
+        return value.translate(_ATTR_ESCAPES)
+    return value
+
+def props_to_html(props):
+    if not props:
+        return ""
+    html = ""
+    for key, value in props.items():
+        html += f' {key}="{escape_attr(value)}"'
+    return html
+
 class HTMLNode:
     def __init__(self, tag=None, value=None, children=None, props=None):
         self.tag = tag
@@ -9,9 +38,7 @@ class HTMLNode:
         raise NotImplementedError("Subclasses of HTMLNode must implement to_html()")
     
     def props_to_html(self):
-        if not self.props:
-            return ""
-        return "".join(f' {key}="{value}"' for key, value in self.props.items())
+        return props_to_html(self.props)
     
     def __repr__(self):
         return (
@@ -24,10 +51,11 @@ class LeafNode(HTMLNode):
         super().__init__(tag=tag, value=value, children=None, props=props)
     
     def to_html(self):
+        value = escape_text(self.value) if self.value else ""
         if self.tag is None:
-            return self.value or ""
+            return value
         props_str = self.props_to_html()
-        return f"<{self.tag}{props_str}>{self.value or ''}</{self.tag}>"
+        return f"<{self.tag}{props_str}>{value}</{self.tag}>"
 
 class ParentNode(HTMLNode):
     def __init__(self, tag, children, props=None):
@@ -0,0 +1,166 @@
+import json, os, struct
+from functions import extract_markdown_images
+from textnode import EventType
+from vfs import DISK, DiskFS
+
+# Enough for the IHDR/GIF/WebP headers; JPEG is read incrementally.
+_HEADER_BYTES = 64
+
+def _png_size(header):
+    if header[12:16] != b"IHDR":
+        return None
+    return struct.unpack(">II", header[16:24])
+
+def _gif_size(header):
+    return struct.unpack("<HH", header[6:10])
+
+def _webp_size(header):
+    chunk = header[12:16]
+    if chunk == b"VP8 ":
+        width, height = struct.unpack("<HH", header[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b"VP8L":
+        bits = int.from_bytes(header[21:25], "little")
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b"VP8X":
+        width = int.from_bytes(header[24:27], "little") + 1
+        height = int.from_bytes(header[27:30], "little") + 1
+        return width, height
+    return None
+
+# Start-of-frame markers carry the dimensions; C4 (DHT), C8 (JPG) and
+# CC (DAC) share the range but are not frames.
+_JPEG_SOF = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+def _jpeg_size(f):
+    f.seek(2)
+    while True:
+        marker = f.read(2)
+        if len(marker) < 2 or marker[0] != 0xFF:
+            return None
+        kind = marker[1]
+        if kind == 0xFF:
+            f.seek(-1, os.SEEK_CUR)
+            continue
+        if kind in (0xD8, 0x01) or 0xD0 <= kind <= 0xD7:
+            continue
+        length_bytes = f.read(2)
+        if len(length_bytes) < 2:
+            return None
+        length = struct.unpack(">H", length_bytes)[0]
+        if kind in _JPEG_SOF:
+            segment = f.read(5)
+            if len(segment) < 5:
+                return None
+            height, width = struct.unpack(">HH", segment[1:5])
+            return width, height
+        f.seek(length - 2, os.SEEK_CUR)
+
+def read_image_size(path: str, fs=DISK):
+    with fs.open_bytes(path) as f:
+        header = f.read(_HEADER_BYTES)
+        if header.startswith(b"\x89PNG\r\n\x1a\n"):
+            return _png_size(header)
+        if header[:6] in (b"GIF87a", b"GIF89a"):
+            return _gif_size(header)
+        if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+            return _webp_size(header)
+        if header[:2] == b"\xff\xd8":
+            return _jpeg_size(f)
+    return None
+
+class ImageSizeCache:
+    def __init__(self, cache_path: str = None):
+        self.cache_path = cache_path
+        # Absolute path -> [mtime_ns, size, width, height]. A stat is enough
+        # to trust an entry, so warm builds never open an unchanged image.
+        self.sizes = {}
+        self._memory = {}
+        self._dirty = False
+        if cache_path and os.path.exists(cache_path):
+            try:
+                with open(cache_path, "r") as f:
+                    # Entries in any other shape come from an older layout.
+                    self.sizes = {key: entry for key, entry in json.load(f).items() if isinstance(entry, list) and len(entry) == 4}
+            except (OSError, ValueError):
+                self.sizes = {}
+
+    def get(self, path: str, fs=DISK):
+        if not fs.isfile(path):
+            return None
+        stat = list(fs.stat_key(path))
+        if not isinstance(fs, DiskFS):
+            # In-memory stat keys only mean something to this process.
+            key = (id(fs), path, tuple(stat))
+            if key not in self._memory:
+                self._memory[key] = read_image_size(path, fs)
+            return self._memory[key]
+
+        key = os.path.abspath(path)
+        entry = self.sizes.get(key)
+        if entry is not None and entry[:2] == stat:
+            return tuple(entry[2:])
+        size = read_image_size(path, fs)
+        if size is not None:
+            self.sizes[key] = stat + list(size)
+            self._dirty = True
+        return size
+
+    def save(self):
+        if not self.cache_path or not self._dirty:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.cache_path)), exist_ok=True)
+        tmp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.sizes, f)
+        os.replace(tmp_path, self.cache_path)
+        self._dirty = False
+
+_cache = ImageSizeCache()
+
+def configure_cache(cache_path: str = None):
+    global _cache
+    if _cache.cache_path != cache_path:
+        _cache = ImageSizeCache(cache_path)
+    return _cache
+
+def get_cache() -> ImageSizeCache:
+    return _cache
+
+def resolve_static_path(url: str, static_dir: str):
+    if not url.startswith("/") or url.startswith("//"):
+        return None
+    path = url.split("?", 1)[0].split("#", 1)[0]
+    return os.path.join(static_dir, path.lstrip("/"))
+
+def image_sizes_key(markdown: str, static_dir: str = None, fs=DISK) -> str:
+    # Rendered pages carry each local image's width and height, so cached
+    # pages are only reusable while those sizes stay the same.
+    if not static_dir:
+        return ""
+    sizes = []
+    for _, url in extract_markdown_images(markdown):
+        path = resolve_static_path(url, static_dir)
+        sizes.append(f"{url} {_cache.get(path, fs) if path else None}")
+    return "\n".join(sizes)
+
+def annotate_images(events, static_dir: str = None, fs=DISK):
+    first = True
+    for event in events:
+        if event[0] is not EventType.SPAN or event[1] != "img":
+            yield event
+            continue
+
+        props = dict(event[3])
+        if static_dir:
+            path = resolve_static_path(props["src"], static_dir)
+            size = _cache.get(path, fs) if path else None
+            if size is not None:
+                props["width"], props["height"] = size
+        # The first image is usually above the fold; lazy-loading it would
+        # delay the largest paint.
+        if not first:
+            props["loading"] = "lazy"
+        props["decoding"] = "async"
+        first = False
+        yield (EventType.SPAN, "img", event[2], props)
@@ -0,0 +1,280 @@
+import argparse, asyncio, json, math, multiprocessing, os, random, ssl, sys, time
+import urllib.parse
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    # Keep-alive without Nagle, like any production server the site would
+    # sit behind; otherwise delayed ACKs dominate every latency.
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    basepath = "/"
+
+    def translate_path(self, path):
+        # The site is built for a basepath, so strip it before looking on disk.
+        if path.startswith(self.basepath):
+            path = "/" + path[len(self.basepath):]
+        return super().translate_path(path)
+
+    def log_message(self, format, *args):
+        pass
+
+def _serve(directory: str, basepath: str, port_pipe):
+    handler = type("Handler", (QuietHandler,), {"basepath": basepath})
+    with ThreadingHTTPServer(("127.0.0.1", 0), partial(handler, directory=directory)) as server:
+        port_pipe.send(server.server_address[1])
+        server.serve_forever()
+
+def start_server(directory: str, basepath: str = "/"):
+    # A separate process, so serving does not compete with the load
+    # generator for the interpreter lock.
+    receiver, sender = multiprocessing.Pipe(duplex=False)
+    process = multiprocessing.Process(target=_serve, args=(directory, basepath, sender), daemon=True)
+    process.start()
+    if not receiver.poll(10):
+        process.terminate()
+        raise RuntimeError(f"Could not start a server for {directory}")
+    return process, receiver.recv()
+
+def site_paths(directory: str, basepath: str = "/") -> list:
+    paths = []
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for file in sorted(files):
+            if not file.endswith(".html"):
+                continue
+            relpath = os.path.relpath(os.path.join(root, file), directory).replace(os.sep, "/")
+            if relpath == "index.html":
+                relpath = ""
+            elif relpath.endswith("/index.html"):
+                relpath = relpath[:-len("index.html")]
+            paths.append(basepath + relpath)
+    return paths
+
+def parse_mix(specs) -> dict:
+    mix = {}
+    for spec in specs:
+        path, sep, weight = spec.rpartition("=")
+        if not sep:
+            path, weight = spec, "1"
+        try:
+            mix[path] = float(weight)
+        except ValueError:
+            raise ValueError(f"Invalid request weight in {spec!r}") from None
+        if mix[path] <= 0:
+            raise ValueError(f"Request weight must be positive in {spec!r}")
+    return mix
+
+# A response still arriving when the run ends gets this long to finish
+# before it counts as a timeout.
+_DEADLINE_GRACE = 1.0
+
+def percentile(sorted_values: list, p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+class Connection:
+    def __init__(self, host: str, port: int, use_ssl: bool):
+        self.host = host
+        self.port = port
+        self.ssl = ssl.create_default_context() if use_ssl else None
+        self.reader = self.writer = None
+
+    async def _connect(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port, ssl=self.ssl)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.reader = self.writer = None
+
+    async def get(self, path: str, headers: dict):
+        if self.writer is None:
+            await self._connect()
+        lines = [f"GET {path} HTTP/1.1", f"Host: {self.host}:{self.port}"]
+        lines += [f"{name}: {value}" for name, value in headers.items()]
+        self.writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError("Connection closed before a response")
+        version, status = status_line.split()[:2]
+        status = int(status)
+        response_headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            response_headers[name.strip().lower()] = value.strip()
+
+        if response_headers.get("transfer-encoding", "").lower() == "chunked":
+            size = 0
+            while True:
+                chunk_size = int((await self.reader.readline()).split(b";")[0], 16)
+                if chunk_size == 0:
+                    await self.reader.readline()
+                    break
+                size += len(await self.reader.readexactly(chunk_size + 2)) - 2
+        elif "content-length" in response_headers:
+            size = len(await self.reader.readexactly(int(response_headers["content-length"])))
+        else:
+            size = len(await self.reader.read())
+            self.close()
+        connection = response_headers.get("connection", "").lower()
+        if connection == "close" or (version == b"HTTP/1.0" and connection != "keep-alive"):
+            self.close()
+        return status, size
+
+class PageStats:
+    def __init__(self):
+        self.latencies = []
+        self.errors = 0
+        self.bytes = 0
+
+    def summary(self, elapsed: float) -> dict:
+        latencies = sorted(self.latencies)
+        return {
+            "requests": len(latencies),
+            "errors": self.errors,
+            "bytes": self.bytes,
+            "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+            "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3) if latencies else 0.0,
+            "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        }
+
+async def _worker(url, paths, weights, headers, deadline, stats, rng):
+    connection = Connection(url.hostname, url.port or (443 if url.scheme == "https" else 80), url.scheme == "https")
+    try:
+        while time.perf_counter() < deadline:
+            path = rng.choices(paths, weights)[0]
+            started = time.perf_counter()
+            try:
+                status, size = await asyncio.wait_for(connection.get(path, headers), deadline - started + _DEADLINE_GRACE)
+            except (OSError, ValueError, IndexError, asyncio.IncompleteReadError, asyncio.TimeoutError):
+                stats[path].errors += 1
+                connection.close()
+                continue
+            elapsed = time.perf_counter() - started
+            if status >= 400:
+                stats[path].errors += 1
+            else:
+                stats[path].latencies.append(elapsed)
+                stats[path].bytes += size
+    finally:
+        connection.close()
+
+async def run_load(base_url: str, mix: dict, concurrency: int = 10, duration: float = 10.0, headers: dict = None, seed: int = 0) -> dict:
+    url = urllib.parse.urlsplit(base_url)
+    paths = list(mix)
+    weights = [mix[path] for path in paths]
+    stats = {path: PageStats() for path in paths}
+    started = time.perf_counter()
+    deadline = started + duration
+    await asyncio.gather(*(
+        _worker(url, paths, weights, headers or {}, deadline, stats, random.Random(seed + i))
+        for i in range(concurrency)
+    ))
+    elapsed = time.perf_counter() - started
+
+    total = PageStats()
+    for page in stats.values():
+        total.latencies += page.latencies
+        total.errors += page.errors
+        total.bytes += page.bytes
+    return {
+        "url": base_url,
+        "concurrency": concurrency,
+        "duration_s": round(elapsed, 3),
+        "headers": headers or {},
+        "mix": mix,
+        "total": total.summary(elapsed),
+        "pages": {path: page.summary(elapsed) for path, page in stats.items()},
+    }
+
+def format_report(results: dict, baseline: dict = None) -> str:
+    rows = [("page", "requests", "errors", "rps", "p50 ms", "p95 ms", "p99 ms")]
+    pages = sorted(results["pages"].items()) + [("TOTAL", results["total"])]
+    for path, page in pages:
+        row = [path, str(page["requests"]), str(page["errors"]), f"{page['throughput_rps']:.1f}",
+               f"{page['p50_ms']:.2f}", f"{page['p95_ms']:.2f}", f"{page['p99_ms']:.2f}"]
+        old = (baseline or {}).get("pages", {}).get(path) if path != "TOTAL" else (baseline or {}).get("total")
+        if old:
+            # Relative change against the baseline run, e.g. after minifying.
+            for i, key in ((3, "throughput_rps"), (5, "p95_ms")):
+                if old[key]:
+                    row[i] += f" ({(page[key] - old[key]) / old[key]:+.0%})"
+        rows.append(tuple(row))
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    return "\n".join("  ".join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip() for row in rows)
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog="loadtest.py", description="Load-test the generated site.")
+    parser.add_argument("--dir", default="docs", help="built site to serve (ignored with --url)")
+    parser.add_argument("--basepath", default="/", help="basepath the site was built for")
+    parser.add_argument("--url", help="load-test an already running server instead of serving --dir")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--duration", type=float, default=10.0, metavar="SECONDS")
+    parser.add_argument("--path", action="append", metavar="PATH[=WEIGHT]",
+                        help="request mix entry (repeatable; default: every page under --dir equally)")
+    parser.add_argument("--header", action="append", default=[], metavar="NAME:VALUE",
+                        help="extra request header, e.g. 'Accept-Encoding: gzip' (repeatable)")
+    parser.add_argument("--seed", type=int, default=0, help="seed for picking paths from the mix")
+    parser.add_argument("--output", metavar="JSON", help="write the results here")
+    parser.add_argument("--compare", metavar="JSON", help="show changes against an earlier --output")
+    return parser.parse_args(argv)
+
+def main(argv=None) -> int:
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    basepath = args.basepath if args.basepath.endswith("/") else args.basepath + "/"
+    headers = {}
+    for header in args.header:
+        name, sep, value = header.partition(":")
+        if not sep:
+            raise SystemExit(f"Invalid --header {header!r}, expected NAME:VALUE")
+        headers[name.strip()] = value.strip()
+
+    # Read the baseline up front so a bad path cannot throw away a run.
+    baseline = None
+    if args.compare:
+        try:
+            with open(args.compare, "r") as f:
+                baseline = json.load(f)
+        except (OSError, ValueError) as e:
+            raise SystemExit(f"Cannot read --compare {args.compare!r}: {e}")
+
+    server = None
+    if args.url:
+        base_url = args.url.rstrip("/")
+        mix = parse_mix(args.path or [basepath])
+    else:
+        if not os.path.isdir(args.dir):
+            raise SystemExit(f"No built site at {args.dir!r}; run the build first or pass --url")
+        mix = parse_mix(args.path or site_paths(args.dir, basepath))
+        server, port = start_server(args.dir, basepath)
+        base_url = f"http://127.0.0.1:{port}"
+        print(f"Serving {args.dir} at {base_url}{basepath}")
+
+    try:
+        print(f"Running {args.concurrency} connection(s) for {args.duration:g}s over {len(mix)} path(s)")
+        results = asyncio.run(run_load(base_url, mix, args.concurrency, args.duration, headers, args.seed))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.join()
+
+    print(format_report(results, baseline))
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Wrote results: {args.output}")
+    return 1 if results["total"]["errors"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,72 +1,525 @@
-import os, shutil, sys
-from functions import extract_title, markdown_to_html_node
+import argparse, json, os, re, sys
+from functions import extract_title, markdown_to_events
+from events import render_html
+from staging import stage_generation, publish_generation, discard_generation, remove_unwritten, rollback
+from images import annotate_images, image_sizes_key
+from css import inline_stylesheets
+from bundles import read_bundle
+from buildlog import LEVELS, configure_log, get_log
+from buildcache import BuildCache, cache_key, content_hash, open_backend
+from htmlnode import escape_text
+from outputs import DirectoryOutput, archive_settings, open_output, TAR_COMPRESSIONS, ZIP_COMPRESSIONS
+from fragments import FRAGMENT_VERSION, NAV_SCRIPT_PATH, fragment_path, inject_nav_script, nav_script, render_fragment
+from precache import PrecacheManifest, RecordingOutput, inject_register_script, record_tree
+from pngopt import optimize_tree
+from split import split_page
+from prefetch import LinkGraph, collect_links, inject_head, prefetch_tags
+from treeshake import ReferenceCollector, report_orphans, used_static_files
+from vfs import DISK, DiskFS
+import buildlog, highlight, images, pngopt
 
-def copy_static_files(src: str, dst: str):
-    if os.path.exists(dst):
-        shutil.rmtree(dst)
-        print(f"Deleted existing directory: {dst}")
+def reset_output_dir(dst: str, fs=DISK):
+    if isinstance(fs, DiskFS) and os.path.islink(dst):
+        # An atomic build left a link to its live generation. A plain build
+        # replaces the link; the generations themselves are kept.
+        fs.remove(dst)
+        buildlog.debug("delete", f"Removed link to live generation: {dst}", path=dst)
+        return
+    if fs.exists(dst):
+        fs.rmtree(dst)
+        buildlog.debug("delete", f"Deleted existing directory: {dst}", path=dst)
 
-    os.mkdir(dst)
-    print(f"Created directory: {dst}")
+def copy_static_files(src: str, dst: str, clean: bool = True, link_from: str = None, overrides: dict = None, include: set = None, fs=DISK):
+    if clean:
+        reset_output_dir(dst, fs)
+
+    fs.makedirs(dst)
+    buildlog.debug("mkdir", f"Created directory: {dst}", path=dst)
+
+    if include is not None:
+        include_dirs = {parent for relpath in include for parent in _parent_dirs(relpath)}
 
     def recursive_copy(src_path: str, dst_path: str):
-        for item in os.listdir(src_path):
+        for item in fs.listdir(src_path):
             src_item = os.path.join(src_path, item)
             dst_item = os.path.join(dst_path, item)
 
-            if os.path.isfile(src_item):
-                shutil.copy(src_item, dst_item)
-                print(f"Copied file: {src_item} -> {dst_item}")
-            elif os.path.isdir(src_item):
-                os.mkdir(dst_item)
-                print(f"Created directory: {dst_item}")
+            if include is not None:
+                relpath = os.path.relpath(src_item, src).replace(os.sep, "/")
+                if relpath not in include and relpath not in include_dirs:
+                    continue
+
+            if fs.isfile(src_item):
+                if link_from is not None:
+                    linked_item = os.path.join(link_from, os.path.relpath(src_item, src))
+                    try:
+                        fs.link(linked_item, dst_item)
+                        buildlog.debug("link", f"Linked file: {linked_item} -> {dst_item}", src=linked_item, dst=dst_item)
+                        buildlog.advance()
+                        continue
+                    except OSError:
+                        pass
+                relpath = os.path.relpath(src_item, src)
+                if overrides and relpath in overrides:
+                    fs.write_bytes(dst_item, overrides[relpath])
+                    buildlog.debug("write", f"Wrote optimized file: {relpath} -> {dst_item}", src=relpath, dst=dst_item)
+                    buildlog.advance()
+                    continue
+                fs.copy_file(src_item, dst_item)
+                buildlog.debug("copy", f"Copied file: {src_item} -> {dst_item}", src=src_item, dst=dst_item)
+                buildlog.advance()
+            elif fs.isdir(src_item):
+                fs.makedirs(dst_item)
+                buildlog.debug("mkdir", f"Created directory: {dst_item}", path=dst_item)
                 recursive_copy(src_item, dst_item)
 
     recursive_copy(src, dst)
 
-def generate_page(md_path: str, template_path: str, output_path: str, basepath: str):
-    with open(md_path, "r") as f:
-        markdown_content = f.read()
+def _parent_dirs(relpath: str):
+    parent = os.path.dirname(relpath)
+    while parent:
+        yield parent
+        parent = os.path.dirname(parent)
+
+def add_static_files(src: str, output, overrides: dict = None, include: set = None, fs=DISK):
+    # Sorted so archive entry order depends only on the inputs.
+    for root, dirs, files in fs.walk(src):
+        dirs.sort()
+        for file in sorted(files):
+            src_item = os.path.join(root, file)
+            relpath = os.path.relpath(src_item, src)
+            if include is not None and relpath.replace(os.sep, "/") not in include:
+                continue
+            if overrides and relpath in overrides:
+                output.write_bytes(relpath, overrides[relpath])
+            else:
+                output.add_file(relpath, src_item, fs)
+            buildlog.debug("add", f"Added file: {src_item} -> {relpath}", src=src_item, dst=relpath)
+            buildlog.advance()
+
+def write_file(path: str, content: str, fs=DISK):
+    fs.write_text(path, content)
+
+_template_cache = {}
+
+def load_template(template_path: str, fs=DISK) -> str:
+    key = (id(fs), os.path.abspath(template_path), fs.stat_key(template_path))
+    template = _template_cache.get(key)
+    if template is None:
+        template = fs.read_text(template_path)
+        _template_cache.clear()
+        _template_cache[key] = template
+    return template
+
+def compile_template(template_path: str, basepath: str, static_dir: str = None, inline_css: int = 0, fs=DISK) -> str:
+    template = load_template(template_path, fs)
+    if inline_css and static_dir:
+        template = inline_stylesheets(template, static_dir, inline_css, basepath, fs)
+    return template
+
+_ROOT_URL_ATTR = re.compile(r'(?<=href=")/|(?<=src=")/')
+
+def split_root_urls(html: str) -> list:
+    # Splitting once at every root-relative href/src lets each basepath
+    # variant be produced with a single join instead of a full re-render.
+    return _ROOT_URL_ATTR.split(html)
+
+def rebase_urls(html: str, basepath: str) -> str:
+    return basepath.join(split_root_urls(html))
 
-    html_node = markdown_to_html_node(markdown_content)
-    html_content = html_node.to_html()
-    title = extract_title(markdown_content)
+def render_content(markdown_content: str, static_dir: str = None, fs=DISK, links: list = None):
+    events = annotate_images(markdown_to_events(markdown_content), static_dir, fs)
+    if links is not None:
+        events = collect_links(events, links)
+    return extract_title(markdown_content), render_html(events)
 
-    with open(template_path, "r") as f:
-        template = f.read()
+def render_pages(markdown_content: str, relative_html_path: str, static_dir: str = None, fs=DISK, links: list = None, split_threshold: int = 0) -> list:
+    if not split_threshold:
+        title, html_content = render_content(markdown_content, static_dir, fs, links)
+        return [(relative_html_path, title, html_content)]
+    # Splitting needs the events twice (sizing, then rendering each part),
+    # so the single parse is kept in memory instead of streamed.
+    events = annotate_images(markdown_to_events(markdown_content), static_dir, fs)
+    if links is not None:
+        events = collect_links(events, links)
+    return split_page(list(events), extract_title(markdown_content), relative_html_path, split_threshold)
 
-    page = template.replace("{{ Title }}", title)
-    page = page.replace("{{ Content }}", html_content)
-    page = page.replace('href="/', f'href="{basepath}')
-    page = page.replace('src="/', f'src="{basepath}')
+def assemble_page(template: str, title: str, content_parts: list, basepath: str) -> str:
+    page = template.replace("{{ Title }}", escape_text(title))
+    return page.replace("{{ Content }}", basepath.join(content_parts))
 
-    with open(output_path, "w") as f:
-        f.write(page)
+def render_page(markdown_content: str, template: str, basepath: str, static_dir: str = None, fs=DISK) -> str:
+    title, html_content = render_content(markdown_content, static_dir, fs)
+    return assemble_page(rebase_urls(template, basepath), title, split_root_urls(html_content), basepath)
 
-def generate_pages_recursive(dir_path_content: str, template_path: str, dest_dir_path: str, basepath: str):
-    for root, _, files in os.walk(dir_path_content):
+def generate_page(md_path: str, template_path: str, output_path: str, basepath: str, static_dir: str = None, template: str = None, fs=DISK):
+    markdown_content = fs.read_text(md_path)
+
+    if template is None:
+        template = load_template(template_path, fs)
+
+    write_file(output_path, render_page(markdown_content, template, basepath, static_dir, fs), fs)
+
+def find_pages(dir_path_content: str, fs=DISK) -> list:
+    pages = []
+    for root, _, files in fs.walk(dir_path_content):
         for file in files:
             if file.endswith(".md"):
                 content_md_path = os.path.join(root, file)
 
                 relative_path = os.path.relpath(content_md_path, dir_path_content)
-                relative_html_path = os.path.splitext(relative_path)[0] + ".html"
-                output_html_path = os.path.join(dest_dir_path, relative_html_path)
+                pages.append((content_md_path, os.path.splitext(relative_path)[0] + ".html"))
+    return sorted(pages, key=lambda page: page[1])
+
+def generate_pages_recursive(dir_path_content: str, template_path: str, dest_dir_path: str, basepath: str, static_dir: str = None, inline_css: int = 0, build_cache: BuildCache = None, fragments: bool = False, prefetch: int = 0, prefetch_budget: int = 0, service_worker: bool = False, split_threshold: int = 0, pages=None, fs=DISK):
+    generate_pages_for_targets(dir_path_content, template_path, [(basepath, dest_dir_path)], static_dir, inline_css, build_cache, fragments, prefetch, prefetch_budget, service_worker, split_threshold, pages, fs)
+
+
+def generate_pages_for_targets(dir_path_content: str, template_path: str, targets: list, static_dir: str = None, inline_css: int = 0, build_cache: BuildCache = None, fragments: bool = False, prefetch: int = 0, prefetch_budget: int = 0, service_worker: bool = False, split_threshold: int = 0, pages=None, fs=DISK):
+    # Templates are compiled and rebased once per basepath; each page is
+    # parsed and rendered once and only assembled per target.
+    templates = []
+    for basepath, _ in targets:
+        template = compile_template(template_path, basepath, static_dir, inline_css, fs)
+        if fragments:
+            template = inject_nav_script(template)
+        template = rebase_urls(template, basepath)
+        if service_worker:
+            template = inject_register_script(template, basepath)
+        templates.append(template)
+    kinds = ("page", "fragment") if fragments else ("page",)
+
+    if pages is None:
+        pages = (
+            (content_md_path, relative_html_path, fs.read_text(content_md_path))
+            for content_md_path, relative_html_path in find_pages(dir_path_content, fs)
+        )
+    # Hints and cache prefetching need every page up front; otherwise
+    # pages stream through and only one is held in memory at a time.
+    sources = list(pages) if prefetch or build_cache is not None else pages
+    rendered = {}
+
+    def render(content_md_path, relative_html_path, markdown_content, links=None):
+        if content_md_path not in rendered:
+            rendered[content_md_path] = [
+                (relpath, title, split_root_urls(html_content))
+                for relpath, title, html_content in render_pages(markdown_content, relative_html_path, static_dir, fs, links, split_threshold)
+            ]
+        return rendered[content_md_path]
+
+    page_templates = {}
+    if prefetch:
+        # Hints depend on every page's links and size, so the whole site
+        # is rendered before anything is assembled.
+        graph = LinkGraph(relative_html_path for _, relative_html_path, _ in sources)
+        sizes = [{} for _ in targets]
+        for content_md_path, relative_html_path, markdown_content in sources:
+            links = []
+            # A split page is linked to through its first part, so that
+            # part's size is what a hint would cost.
+            _, title, parts = render(content_md_path, relative_html_path, markdown_content, links)[0]
+            graph.add_page(relative_html_path, links)
+            for i, (basepath, _) in enumerate(targets):
+                if fragments:
+                    size = len(render_fragment(title, basepath.join(parts)).encode("utf-8"))
+                else:
+                    size = len(assemble_page(templates[i], title, parts, basepath).encode("utf-8"))
+                sizes[i][relative_html_path] = size
+        for _, relative_html_path, _ in sources:
+            for i, (basepath, _) in enumerate(targets):
+                chosen = graph.prefetch_targets(relative_html_path, prefetch, prefetch_budget, sizes[i])
+                # With fragments the client script only ever fetches the fragment.
+                urls = [
+                    "/" + fragment_path(target).replace(os.sep, "/") if fragments else graph.link_url(relative_html_path, target)
+                    for target in chosen
+                ]
+                tags = prefetch_tags(urls, basepath)
+                page_templates[relative_html_path, i] = inject_head(templates[i], tags)
+
+    keys = {}
+    if build_cache is not None:
+        # Split pages are cached as one JSON object of every part, under
+        # keys that also cover the threshold.
+        split_suffix = f"\0split={split_threshold}" if split_threshold else ""
+        for content_md_path, relative_html_path, markdown_content in sources:
+            source_hash = content_hash(markdown_content)
+            assets_hash = content_hash(image_sizes_key(markdown_content, static_dir, fs))
+            for i, (basepath, _) in enumerate(targets):
+                template = page_templates.get((relative_html_path, i), templates[i])
+                keys[relative_html_path, i, "page"] = cache_key(source_hash, content_hash(template + split_suffix), basepath, assets_hash)
+                if fragments:
+                    keys[relative_html_path, i, "fragment"] = cache_key(source_hash, FRAGMENT_VERSION + split_suffix, basepath, assets_hash)
+        # Fetch every artifact up front so network latency overlaps instead
+        # of being paid page by page during rendering.
+        build_cache.prefetch(keys.values())
+
+    outputs = [DirectoryOutput(dest, fs) if isinstance(dest, str) else dest for _, dest in targets]
+    if fragments:
+        for output in outputs:
+            output.write_bytes(NAV_SCRIPT_PATH, nav_script())
+
+    buildlog.start("Generating pages", len(sources) if isinstance(sources, list) else None)
+    for content_md_path, relative_html_path, markdown_content in sources:
+        for i, (basepath, _) in enumerate(targets):
+            output = outputs[i]
+            for kind in kinds:
+                key = keys.get((relative_html_path, i, kind))
+                cached = build_cache.get(key) if key is not None else None
+                if cached is not None:
+                    if split_threshold:
+                        artifacts = {relpath: data.encode("utf-8") for relpath, data in json.loads(cached).items()}
+                    else:
+                        artifacts = {relative_html_path if kind == "page" else fragment_path(relative_html_path): cached}
+                    for relpath, data in artifacts.items():
+                        buildlog.debug("restore", f"Restored {kind} from cache: {relpath}", kind=kind, path=relpath)
+                        output.write_bytes(relpath, data)
+                    continue
+
+                artifacts = {}
+                for part_path, title, parts in render(content_md_path, relative_html_path, markdown_content):
+                    relpath = part_path if kind == "page" else fragment_path(part_path)
+                    if kind == "page":
+                        buildlog.debug("render", f"Generating page: {content_md_path} -> {relpath}", kind=kind, src=content_md_path, path=relpath)
+                        template = page_templates.get((relative_html_path, i), templates[i])
+                        data = assemble_page(template, title, parts, basepath)
+                    else:
+                        buildlog.debug("render", f"Generating fragment: {content_md_path} -> {relpath}", kind=kind, src=content_md_path, path=relpath)
+                        data = render_fragment(title, basepath.join(parts))
+                    data = data.encode("utf-8")
+                    output.write_bytes(relpath, data)
+                    artifacts[relpath] = data
+                if key is not None:
+                    if split_threshold:
+                        data = json.dumps({relpath: data.decode("utf-8") for relpath, data in artifacts.items()}).encode("utf-8")
+                    build_cache.put(key, data)
+        # Nothing later needs this page's render once every target has it.
+        rendered.pop(content_md_path, None)
+        buildlog.advance()
+    buildlog.finish("pages", "Generated pages")
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog="main.py", description="Build the static site.")
+    parser.add_argument("basepath", nargs="?", default="/")
+    parser.add_argument("--output", default="docs")
+    parser.add_argument("--target", action="append", metavar="BASEPATH:OUTPUT",
+                        help="build one variant per basepath from a single parse (repeatable)")
+    parser.add_argument("--atomic", action="store_true",
+                        help="render into a staging generation and swap it in with a symlink flip")
+    parser.add_argument("--keep", type=int, default=3,
+                        help="previous generations to keep for rollback (with --atomic)")
+    parser.add_argument("--seed", action="store_true",
+                        help="seed the staging generation from the live one (with --atomic)")
+    parser.add_argument("--archive", action="store_true",
+                        help="stream each output into a tar/zip archive named by --output/--target")
+    parser.add_argument("--compression", choices=sorted(set(TAR_COMPRESSIONS + ZIP_COMPRESSIONS)),
+                        help="archive compression (default: inferred from the archive suffix)")
+    parser.add_argument("--cache-dir", default=".cache",
+                        help="directory for persistent build caches ('' to disable)")
+    parser.add_argument("--inline-css", type=int, default=0, metavar="BYTES",
+                        help="inline local stylesheets up to this minified size; preload larger ones")
+    parser.add_argument("--build-cache", metavar="DIR_OR_URL",
+                        help="shared content-addressed cache for rendered pages and optimized images (directory or http(s) URL)")
+    parser.add_argument("--fragments", action="store_true",
+                        help="also write a JSON fragment per page and a script that swaps them in on navigation")
+    parser.add_argument("--prefetch", type=int, default=0, metavar="K",
+                        help="add prefetch hints for each page's top K internal link targets")
+    parser.add_argument("--prefetch-budget", type=int, default=200000, metavar="BYTES",
+                        help="most bytes each page may ask the browser to prefetch (0 for no limit)")
+    parser.add_argument("--service-worker", action="store_true",
+                        help="write a precache manifest and a service worker that serves pages offline")
+    parser.add_argument("--precache-max-bytes", type=int, default=250000, metavar="BYTES",
+                        help="leave files larger than this out of the precache manifest (0 for no limit)")
+    parser.add_argument("--optimize-images", action="store_true",
+                        help="losslessly recompress static PNGs (results are cached by content)")
+    parser.add_argument("--image-workers", type=int, metavar="N",
+                        help="processes used by --optimize-images (default: one per CPU)")
+    parser.add_argument("--split-threshold", type=int, default=0, metavar="BYTES",
+                        help="split pages whose rendered content exceeds this size at H2 headings (0 to never split)")
+    parser.add_argument("--content-bundle", metavar="PATH",
+                        help="read pages from a .jsonl (path/content objects), tar or zip bundle instead of content/")
+    parser.add_argument("--prune-static", action="store_true",
+                        help="only ship static files referenced by pages, the template or stylesheets")
+    parser.add_argument("--keep-static", action="append", metavar="GLOB",
+                        help="static files to ship even when unreferenced, with --prune-static (repeatable)")
+    parser.add_argument("--log-level", choices=list(LEVELS), default="info",
+                        help="least important messages to show; per-file messages are 'debug'")
+    parser.add_argument("--log-json", metavar="PATH",
+                        help="also append buffered JSON-lines log records here ('-' for stdout instead of text)")
+    parser.add_argument("--progress", action=argparse.BooleanOptionalAction,
+                        help="show a progress line with throughput and ETA (default: when stdout is a terminal)")
+    parser.add_argument("--rollback", type=int, metavar="STEPS",
+                        help="point the output back at an earlier generation and exit")
+    args = parser.parse_args(argv)
+    if args.archive:
+        # Checked before anything is built or opened, so a bad combination
+        # fails fast instead of leaving a temp archive behind.
+        for target in args.target or [args.output]:
+            try:
+                archive_settings(target.partition(":")[2] if args.target else target, args.compression)
+            except ValueError as e:
+                parser.error(str(e))
+    return args
+
+def normalize_basepath(basepath: str) -> str:
+    return basepath if basepath.endswith("/") else basepath + "/"
+
+def parse_targets(args) -> list:
+    if not args.target:
+        return [(normalize_basepath(args.basepath), args.output)]
+    targets = []
+    for target in args.target:
+        basepath, sep, output_dir = target.partition(":")
+        if not sep or not output_dir:
+            raise SystemExit(f"Invalid --target {target!r}, expected BASEPATH:OUTPUT")
+        targets.append((normalize_basepath(basepath), output_dir))
+    return targets
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    configure_log(LEVELS[args.log_level], args.log_json, args.progress)
+    try:
+        run_build(args)
+    finally:
+        # Per-file messages are buffered, so whatever is left goes out even
+        # when the build fails.
+        get_log().close()
+
+def run_build(args):
+    targets = parse_targets(args)
+
+    if args.cache_dir:
+        highlight.configure_cache(os.path.abspath(os.path.join(args.cache_dir, "highlight")))
+        images.configure_cache(os.path.abspath(os.path.join(args.cache_dir, "imagesize.json")))
+        pngopt.configure_cache(os.path.abspath(os.path.join(args.cache_dir, "pngopt")))
+
+    if args.rollback is not None:
+        for _, output_dir in targets:
+            target = rollback(output_dir, args.rollback)
+            buildlog.info("rollback", f"Rolled back {output_dir} -> {target}", output=output_dir, target=target)
+        return
+
+    build_cache = BuildCache(open_backend(args.build_cache)) if args.build_cache else None
+    pages = read_bundle(args.content_bundle) if args.content_bundle else None
+    overrides = optimize_tree("static", DISK, args.image_workers, build_cache) if args.optimize_images else None
+
+    references = set() if args.prune_static else None
+
+    if args.archive:
+        # Archives are written beside their destination and renamed into
+        # place on close, which already gives atomic replacement.
+        archives = []
+        try:
+            for _, path in targets:
+                archives.append(open_output(path, True, args.compression))
+            build_targets = [
+                (basepath, wrap_output(archive, basepath, args, references))
+                for (basepath, _), archive in zip(targets, archives)
+            ]
+            if references is None:
+                add_static_to_outputs(build_targets, overrides)
+            generate_pages_for_targets("content", "template.html", build_targets, "static", args.inline_css, build_cache, args.fragments, args.prefetch, args.prefetch_budget, args.service_worker, args.split_threshold, pages)
+            if references is not None:
+                include = shake_static_files(references, args.keep_static)
+                add_static_to_outputs(build_targets, overrides, include)
+            for (_, path), (basepath, output) in zip(targets, build_targets):
+                if args.service_worker:
+                    write_service_worker(output, basepath)
+                output.close()
+                buildlog.info("archive", f"Wrote archive: {path}", path=path)
+        except BaseException:
+            for archive in archives:
+                archive.abort()
+            buildlog.error("abort", "Build failed, no archive was written")
+            raise
+        finish_build(build_cache)
+        return
+
+    build_targets = []
+    try:
+        for basepath, output_dir in targets:
+            if args.atomic:
+                dest_dir = stage_generation(output_dir, seed=args.seed)
+                buildlog.info("stage", f"Staging build in: {dest_dir}", path=dest_dir)
+            else:
+                dest_dir = output_dir
+            build_targets.append((basepath, dest_dir))
+
+        clean = not (args.atomic and args.seed)
+        if references is None:
+            copy_static_to_targets(build_targets, clean, overrides)
+        elif clean:
+            # Pages are written first so their references decide which
+            # assets ship; the static copy then must not wipe them.
+            for _, dest_dir in build_targets:
+                reset_output_dir(dest_dir)
+
+        page_targets = [(basepath, wrap_output(DirectoryOutput(dest_dir), basepath, args, references)) for basepath, dest_dir in build_targets]
+        generate_pages_for_targets("content", "template.html", page_targets, "static", args.inline_css, build_cache, args.fragments, args.prefetch, args.prefetch_budget, args.service_worker, args.split_threshold, pages)
+
+        include = None
+        if references is not None:
+            include = shake_static_files(references, args.keep_static)
+            copy_static_to_targets(build_targets, False, overrides, include)
+
+        if args.service_worker:
+            for basepath, output in page_targets:
+                record_tree(output.manifest, "static", DISK, overrides, include)
+                write_service_worker(output, basepath)
+
+        if args.atomic:
+            for (_, output_dir), (_, staging) in zip(targets, build_targets):
+                if args.seed:
+                    removed = remove_unwritten(output_dir, staging)
+                    for relpath in removed:
+                        buildlog.debug("delete", f"Removed stale file: {relpath}", path=relpath)
+                    buildlog.info("stale", f"Removed {len(removed)} stale file(s) from {staging}", count=len(removed), path=staging)
+                generation = publish_generation(output_dir, staging, keep=args.keep)
+                buildlog.info("publish", f"Published {generation} as {output_dir}", generation=generation, output=output_dir)
+    except BaseException:
+        # A staged tree that was never published is only a partial build.
+        if args.atomic:
+            for _, staging in build_targets:
+                discard_generation(staging)
+                buildlog.error("discard", f"Build failed, discarded staging tree: {staging}", path=staging)
+        raise
+
+    finish_build(build_cache)
+
+def wrap_output(output, basepath: str, args, references: set = None):
+    if references is not None:
+        output = ReferenceCollector(output, basepath, references)
+    if args.service_worker:
+        output = RecordingOutput(output, PrecacheManifest(args.precache_max_bytes))
+    return output
+
+def copy_static_to_targets(build_targets: list, clean: bool, overrides: dict = None, include: set = None):
+    # The first output gets real copies; the rest hardlink to them.
+    first_dest = build_targets[0][1]
+    buildlog.start("Copying static files")
+    for i, (_, dest_dir) in enumerate(build_targets):
+        copy_static_files("static", dest_dir, clean=clean, link_from=first_dest if i else None,
+                          overrides=overrides, include=include)
+    buildlog.finish("static", "Copied static files")
 
-                output_dir = os.path.dirname(output_html_path)
-                os.makedirs(output_dir, exist_ok=True)
+def add_static_to_outputs(build_targets: list, overrides: dict = None, include: set = None):
+    buildlog.start("Adding static files")
+    for _, output in build_targets:
+        add_static_files("static", output, overrides, include)
+    buildlog.finish("static", "Added static files")
 
-                print(f"Generating page: {content_md_path} -> {output_html_path}")
-                generate_page(content_md_path, template_path, output_html_path, basepath)
+def shake_static_files(references: set, keep: list = None) -> set:
+    include = used_static_files("static", references, DISK, keep or ())
+    report_orphans("static", include, DISK)
+    return include
 
-def main():
-    basepath = sys.argv[1] if len(sys.argv) > 1 else "/"
-    if not basepath.endswith("/"):
-        basepath += "/"
+def write_service_worker(output: RecordingOutput, basepath: str):
+    count = output.manifest.write(output.output, basepath)
+    buildlog.info("service-worker", f"Wrote service worker precaching {count} files", count=count)
 
-    output_dir = "docs"
-    copy_static_files("static", output_dir)
-    generate_pages_recursive("content", "template.html", output_dir, basepath)
+def finish_build(build_cache: BuildCache = None):
+    images.get_cache().save()
+    if build_cache is not None:
+        buildlog.info("build-cache", f"Build cache: {build_cache.hits} hit(s), {build_cache.misses} miss(es)", hits=build_cache.hits, misses=build_cache.misses)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,49 @@
+(function () {
+  var article = document.querySelector("article");
+  if (!article || !window.fetch || !window.history.pushState) return;
+
+  function fragmentUrl(url) {
+    var path = url.pathname;
+    if (/\.html$/.test(path)) return path.replace(/\.html$/, ".frag.json");
+    if (/\.[^\/]*$/.test(path)) return null;
+    return path.replace(/\/?$/, "/") + "index.frag.json";
+  }
+
+  function show(url, push) {
+    var source = fragmentUrl(url);
+    if (!source) return Promise.reject();
+    return fetch(source, { credentials: "same-origin" })
+      .then(function (response) {
+        if (!response.ok) throw new Error(response.status);
+        return response.json();
+      })
+      .then(function (fragment) {
+        article.innerHTML = fragment.content;
+        document.title = fragment.title;
+        if (push) window.history.pushState(null, "", url.href);
+        var target = url.hash && document.getElementById(decodeURIComponent(url.hash.slice(1)));
+        if (target) target.scrollIntoView();
+        else if (push) window.scrollTo(0, 0);
+      });
+  }
+
+  document.addEventListener("click", function (event) {
+    if (event.defaultPrevented || event.button !== 0) return;
+    if (event.metaKey || event.ctrlKey || event.shiftKey || event.altKey) return;
+    var link = event.target.closest && event.target.closest("a[href]");
+    if (!link || link.target || link.hasAttribute("download")) return;
+    var url = new URL(link.href, location.href);
+    if (url.origin !== location.origin) return;
+    if (url.pathname === location.pathname && url.hash) return;
+    event.preventDefault();
+    show(url, true).catch(function () {
+      location.href = url.href;
+    });
+  });
+
+  window.addEventListener("popstate", function () {
+    show(new URL(location.href), false).catch(function () {
+      location.reload();
+    });
+  });
+})();
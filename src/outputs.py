@@ -0,0 +1,160 @@
+import bz2, gzip, io, lzma, os, shutil, tarfile, time, zipfile
+from vfs import DISK
+
+ARCHIVE_SUFFIXES = {
+    ".tar": ("tar", "none"),
+    ".tar.gz": ("tar", "gz"),
+    ".tgz": ("tar", "gz"),
+    ".tar.bz2": ("tar", "bz2"),
+    ".tar.xz": ("tar", "xz"),
+    ".zip": ("zip", "deflate"),
+}
+
+TAR_COMPRESSIONS = ("none", "gz", "bz2", "xz")
+ZIP_COMPRESSIONS = ("none", "deflate", "bz2", "xz")
+
+# Earliest timestamp a zip entry can carry.
+_ZIP_EPOCH = 315532800
+
+def source_date_epoch() -> int:
+    return int(os.environ.get("SOURCE_DATE_EPOCH", _ZIP_EPOCH))
+
+class DirectoryOutput:
+    def __init__(self, root: str, fs=DISK):
+        self.root = root
+        self.fs = fs
+
+    def write_bytes(self, relpath: str, data: bytes):
+        path = os.path.join(self.root, relpath)
+        self.fs.makedirs(os.path.dirname(path))
+        self.fs.write_bytes(path, data)
+
+    def add_file(self, relpath: str, src_path: str, fs=DISK):
+        path = os.path.join(self.root, relpath)
+        self.fs.makedirs(os.path.dirname(path))
+        if fs is self.fs:
+            self.fs.copy_file(src_path, path)
+        else:
+            self.fs.write_bytes(path, fs.read_bytes(src_path))
+
+    def close(self):
+        pass
+
+class ArchiveOutput:
+    def __init__(self, path: str, fmt: str, compression: str, mtime: int = None):
+        self.path = path
+        self.fmt = fmt
+        self.compression = compression
+        self.mtime = source_date_epoch() if mtime is None else mtime
+        self.names = set()
+        check_archive(fmt, compression)
+        # Written next to the destination and renamed into place on close,
+        # so a failed build never leaves a truncated archive behind.
+        self._tmp_path = f"{path}.{os.getpid()}.tmp"
+        self._raw = open(self._tmp_path, "wb")
+        self._stream = None
+
+        if fmt == "tar":
+            if compression == "gz":
+                # GzipFile would otherwise embed the current time and filename.
+                self._stream = gzip.GzipFile(filename="", mode="wb", fileobj=self._raw, mtime=0)
+            elif compression == "bz2":
+                self._stream = bz2.BZ2File(self._raw, mode="wb")
+            elif compression == "xz":
+                self._stream = lzma.LZMAFile(self._raw, mode="wb")
+            self._archive = tarfile.open(fileobj=self._stream or self._raw, mode="w|", format=tarfile.PAX_FORMAT)
+        else:
+            method = {
+                "none": zipfile.ZIP_STORED,
+                "deflate": zipfile.ZIP_DEFLATED,
+                "bz2": zipfile.ZIP_BZIP2,
+                "xz": zipfile.ZIP_LZMA,
+            }[compression]
+            self._archive = zipfile.ZipFile(self._raw, mode="w", compression=method)
+
+    def _check_name(self, relpath: str) -> str:
+        name = relpath.replace(os.sep, "/")
+        if name in self.names:
+            raise ValueError(f"Duplicate archive entry: {name}")
+        self.names.add(name)
+        return name
+
+    def _tar_info(self, name: str, size: int) -> tarfile.TarInfo:
+        info = tarfile.TarInfo(name)
+        info.size = size
+        info.mtime = self.mtime
+        info.mode = 0o644
+        info.uid = info.gid = 0
+        info.uname = info.gname = ""
+        return info
+
+    def _zip_info(self, name: str) -> zipfile.ZipInfo:
+        info = zipfile.ZipInfo(name, date_time=time.gmtime(max(self.mtime, _ZIP_EPOCH))[:6])
+        info.compress_type = self._archive.compression
+        info.external_attr = 0o644 << 16
+        return info
+
+    def write_bytes(self, relpath: str, data: bytes):
+        name = self._check_name(relpath)
+        if self.fmt == "tar":
+            self._archive.addfile(self._tar_info(name, len(data)), io.BytesIO(data))
+        else:
+            self._archive.writestr(self._zip_info(name), data)
+
+    def add_file(self, relpath: str, src_path: str, fs=DISK):
+        name = self._check_name(relpath)
+        with fs.open_bytes(src_path) as src:
+            if self.fmt == "tar":
+                size = fs.getsize(src_path)
+                self._archive.addfile(self._tar_info(name, size), src)
+            else:
+                with self._archive.open(self._zip_info(name), "w") as dst:
+                    shutil.copyfileobj(src, dst)
+
+    def close(self):
+        self._archive.close()
+        if self._stream is not None:
+            self._stream.close()
+        self._raw.close()
+        os.replace(self._tmp_path, self.path)
+
+    def abort(self):
+        # Closing the layers in order keeps them from flushing into a closed
+        # file when collected; what they write is thrown away anyway.
+        try:
+            self._archive.close()
+            if self._stream is not None:
+                self._stream.close()
+        except (OSError, ValueError):
+            pass
+        self._raw.close()
+        if os.path.exists(self._tmp_path):
+            os.remove(self._tmp_path)
+
+def check_archive(fmt: str, compression: str):
+    if fmt == "tar":
+        if compression not in TAR_COMPRESSIONS:
+            raise ValueError(f"Unsupported tar compression: {compression}")
+    elif fmt == "zip":
+        if compression not in ZIP_COMPRESSIONS:
+            raise ValueError(f"Unsupported zip compression: {compression}")
+    else:
+        raise ValueError(f"Unsupported archive format: {fmt}")
+
+def archive_format(path: str):
+    for suffix, fmt in ARCHIVE_SUFFIXES.items():
+        if path.endswith(suffix):
+            return fmt
+    return None
+
+def archive_settings(path: str, compression: str = None):
+    fmt = archive_format(path)
+    if fmt is None:
+        raise ValueError(f"Cannot infer archive format from {path!r}; use .tar, .tar.gz, .tar.bz2, .tar.xz or .zip")
+    check_archive(fmt[0], compression or fmt[1])
+    return fmt[0], compression or fmt[1]
+
+def open_output(path: str, archive: bool = False, compression: str = None):
+    if not archive:
+        return DirectoryOutput(path)
+    return ArchiveOutput(path, *archive_settings(path, compression))
@@ -0,0 +1,225 @@
+import hashlib, os, struct, zlib
+from concurrent.futures import ProcessPoolExecutor
+from buildcache import LocalDirBackend
+import buildlog
+
+# Bump when the optimizer changes so cached results are recomputed.
+OPTIMIZER_VERSION = "1"
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# Ancillary chunks that change how pixels are displayed survive; text,
+# timestamps, EXIF and the like are dropped.
+_KEEP_ANCILLARY = {b"tRNS", b"gAMA", b"cHRM", b"sRGB", b"iCCP", b"sBIT"}
+_CHANNELS = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}
+_STRATEGIES = (zlib.Z_DEFAULT_STRATEGY, zlib.Z_FILTERED)
+_FINALISTS = 2
+# Signed distance from zero, the usual heuristic for picking a row filter.
+_MAGNITUDE = bytes(min(v, 256 - v) for v in range(256))
+
+def read_chunks(data: bytes) -> list:
+    if not data.startswith(PNG_SIGNATURE):
+        raise ValueError("Not a PNG file")
+    chunks = []
+    pos = len(PNG_SIGNATURE)
+    while pos < len(data):
+        if pos + 8 > len(data):
+            raise ValueError("Truncated PNG chunk header")
+        length, kind = struct.unpack(">I4s", data[pos:pos + 8])
+        body = data[pos + 8:pos + 8 + length]
+        crc = data[pos + 8 + length:pos + 12 + length]
+        if len(body) < length or len(crc) < 4:
+            raise ValueError("Truncated PNG chunk")
+        if struct.unpack(">I", crc)[0] != zlib.crc32(kind + body):
+            raise ValueError(f"Bad CRC in {kind.decode('latin-1')} chunk")
+        chunks.append((kind, body))
+        pos += 12 + length
+        if kind == b"IEND":
+            break
+    if not chunks or chunks[0][0] != b"IHDR" or chunks[-1][0] != b"IEND":
+        raise ValueError("PNG is missing IHDR or IEND")
+    return chunks
+
+def write_chunk(kind: bytes, body: bytes) -> bytes:
+    return struct.pack(">I", len(body)) + kind + body + struct.pack(">I", zlib.crc32(kind + body))
+
+def _paeth(a, b, c):
+    p = a + b - c
+    pa, pb, pc = abs(p - a), abs(p - b), abs(p - c)
+    if pa <= pb and pa <= pc:
+        return a
+    return b if pb <= pc else c
+
+def unfilter_rows(raw: bytes, height: int, stride: int, bpp: int) -> list:
+    rows = []
+    prev = bytes(stride)
+    pos = 0
+    for _ in range(height):
+        kind = raw[pos]
+        line = bytearray(raw[pos + 1:pos + 1 + stride])
+        if len(line) < stride:
+            raise ValueError("Truncated image data")
+        pos += 1 + stride
+        if kind == 1:
+            for i in range(bpp, stride):
+                line[i] = (line[i] + line[i - bpp]) & 255
+        elif kind == 2:
+            line = bytearray((a + b) & 255 for a, b in zip(line, prev))
+        elif kind == 3:
+            for i in range(stride):
+                left = line[i - bpp] if i >= bpp else 0
+                line[i] = (line[i] + ((left + prev[i]) >> 1)) & 255
+        elif kind == 4:
+            for i in range(stride):
+                if i >= bpp:
+                    line[i] = (line[i] + _paeth(line[i - bpp], prev[i], prev[i - bpp])) & 255
+                else:
+                    line[i] = (line[i] + prev[i]) & 255
+        elif kind != 0:
+            raise ValueError(f"Unknown PNG filter type {kind}")
+        prev = bytes(line)
+        rows.append(prev)
+    return rows
+
+def filter_row(kind: int, row: bytes, prev: bytes, bpp: int) -> bytes:
+    if kind == 0:
+        return row
+    left = bytes(bpp) + row[:-bpp]
+    if kind == 1:
+        return bytes((c - a) & 255 for c, a in zip(row, left))
+    if kind == 2:
+        return bytes((c - b) & 255 for c, b in zip(row, prev))
+    if kind == 3:
+        return bytes((c - ((a + b) >> 1)) & 255 for c, a, b in zip(row, left, prev))
+    upper_left = bytes(bpp) + prev[:-bpp]
+    return bytes((x - _paeth(a, b, c)) & 255 for x, a, b, c in zip(row, left, prev, upper_left))
+
+def filtered_streams(rows: list, bpp: int):
+    # One stream per fixed filter plus an adaptive one that picks the
+    # filter per row; every row is filtered five ways exactly once.
+    fixed = [bytearray() for _ in range(5)]
+    adaptive = bytearray()
+    prev = bytes(len(rows[0])) if rows else b""
+    for row in rows:
+        candidates = [filter_row(kind, row, prev, bpp) for kind in range(5)]
+        best = min(range(5), key=lambda kind: sum(candidates[kind].translate(_MAGNITUDE)))
+        for kind, line in enumerate(candidates):
+            fixed[kind].append(kind)
+            fixed[kind] += line
+        adaptive.append(best)
+        adaptive += candidates[best]
+        prev = row
+    return [bytes(stream) for stream in fixed] + [bytes(adaptive)]
+
+def compress(data: bytes, strategy: int) -> bytes:
+    compressor = zlib.compressobj(9, zlib.DEFLATED, 15, 9, strategy)
+    return compressor.compress(data) + compressor.flush()
+
+def optimize_png(data: bytes) -> bytes:
+    chunks = read_chunks(data)
+    kinds = {kind for kind, _ in chunks}
+    width, height, depth, color, _, _, interlace = struct.unpack(">IIBBBBB", chunks[0][1])
+    # Animated PNGs keep frames in ancillary chunks, and Adam7 passes
+    # would need their own filtering; both are left untouched.
+    if b"acTL" in kinds or interlace != 0 or color not in _CHANNELS:
+        return data
+
+    bits = _CHANNELS[color] * depth
+    stride = (width * bits + 7) // 8
+    bpp = max(1, bits // 8)
+    raw = zlib.decompress(b"".join(body for kind, body in chunks if kind == b"IDAT"))
+    rows = unfilter_rows(raw, height, stride, bpp)
+
+    # Maximum-effort deflate is slow; a fast pass ranks the filter
+    # choices reliably enough that only the leaders get the full search.
+    streams = sorted(filtered_streams(rows, bpp), key=lambda stream: len(zlib.compress(stream, 1)))
+    idat = min(
+        (compress(stream, strategy) for stream in streams[:_FINALISTS] for strategy in _STRATEGIES),
+        key=len,
+    )
+    out = [PNG_SIGNATURE]
+    for kind, body in chunks:
+        if kind == b"IDAT":
+            if idat is not None:
+                out.append(write_chunk(b"IDAT", idat))
+                idat = None
+        elif kind == b"IEND" or kind in _KEEP_ANCILLARY or not kind[0] & 0x20:
+            out.append(write_chunk(kind, body))
+    optimized = b"".join(out)
+    return optimized if len(optimized) < len(data) else data
+
+def _optimize_or_keep(data: bytes) -> bytes:
+    try:
+        return optimize_png(data)
+    except (ValueError, zlib.error):
+        return data
+
+class PngCache:
+    def __init__(self, cache_dir: str = None):
+        self.cache_dir = cache_dir
+        self.backend = LocalDirBackend(cache_dir) if cache_dir else None
+        self.results = {}
+
+    def key(self, data: bytes) -> str:
+        return hashlib.sha256(OPTIMIZER_VERSION.encode("utf-8") + b"\0" + data).hexdigest()
+
+    def get(self, key: str):
+        if key not in self.results and self.backend is not None:
+            self.results[key] = self.backend.get(key)
+        return self.results.get(key)
+
+    def put(self, key: str, data: bytes):
+        self.results[key] = data
+        if self.backend is not None:
+            self.backend.put(key, data)
+
+_cache = PngCache()
+
+def configure_cache(cache_dir: str = None):
+    global _cache
+    if _cache.cache_dir != cache_dir:
+        _cache = PngCache(cache_dir)
+    return _cache
+
+def get_cache() -> PngCache:
+    return _cache
+
+def optimize_tree(src: str, fs, workers: int = None, build_cache=None) -> dict:
+    sources = {}
+    for root, _, files in fs.walk(src):
+        for file in files:
+            if file.lower().endswith(".png"):
+                path = os.path.join(root, file)
+                sources[os.path.relpath(path, src)] = fs.read_bytes(path)
+
+    keys = {relpath: _cache.key(data) for relpath, data in sources.items()}
+    results = {relpath: _cache.get(key) for relpath, key in keys.items()}
+    pending = sorted(relpath for relpath, result in results.items() if result is None)
+    if pending and build_cache is not None:
+        # The shared build cache lets runners reuse each other's images.
+        build_cache.prefetch(keys[relpath] for relpath in pending)
+        for relpath in pending:
+            result = build_cache.get(keys[relpath])
+            if result is not None:
+                _cache.put(keys[relpath], result)
+                results[relpath] = result
+        pending = [relpath for relpath in pending if results[relpath] is None]
+    if pending:
+        # Filtering is pure Python, so images are spread over processes.
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for relpath, result in zip(pending, pool.map(_optimize_or_keep, [sources[relpath] for relpath in pending])):
+                _cache.put(keys[relpath], result)
+                if build_cache is not None:
+                    build_cache.put(keys[relpath], result)
+                results[relpath] = result
+
+    optimized = {}
+    saved = 0
+    for relpath in sorted(sources):
+        before, after = len(sources[relpath]), len(results[relpath])
+        if after < before:
+            optimized[relpath] = results[relpath]
+            saved += before - after
+            buildlog.debug("optimize-image", f"Optimized image: {relpath} ({before} -> {after} bytes)", path=relpath, before=before, after=after)
+    buildlog.info("optimize-images", f"Optimized {len(optimized)} of {len(sources)} image(s), saving {saved} bytes", count=len(optimized), bytes=saved)
+    return optimized
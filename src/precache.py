@@ -0,0 +1,83 @@
+import hashlib, json, os
+from prefetch import inject_head
+
+MANIFEST_PATH = "precache-manifest.json"
+SERVICE_WORKER_PATH = "sw.js"
+
+_SERVICE_WORKER_SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sw.js")
+
+def revision(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:16]
+
+class PrecacheManifest:
+    def __init__(self, max_bytes: int = 0):
+        self.max_bytes = max_bytes
+        self.entries = {}
+
+    def add(self, relpath: str, data: bytes):
+        self.entries[relpath.replace(os.sep, "/")] = (revision(data), len(data))
+
+    def add_file(self, relpath: str, path: str, fs):
+        # Files over the cap are left out anyway, so they are never read.
+        if self.max_bytes and fs.getsize(path) > self.max_bytes:
+            return
+        self.add(relpath, fs.read_bytes(path))
+
+    def included(self):
+        # Large files (mostly images) would make the first install slow
+        # and are cheap to skip: the worker falls back to the network.
+        for relpath, (rev, size) in sorted(self.entries.items()):
+            if self.max_bytes and size > self.max_bytes:
+                continue
+            if relpath in (MANIFEST_PATH, SERVICE_WORKER_PATH):
+                continue
+            yield relpath, rev
+
+    def to_json(self, basepath: str) -> str:
+        return json.dumps([{"url": basepath + relpath, "revision": rev} for relpath, rev in self.included()], indent=1)
+
+    def service_worker(self, basepath: str, manifest: str) -> str:
+        with open(_SERVICE_WORKER_SOURCE, "r") as f:
+            source = f.read()
+        source = source.replace("{{ Basepath }}", json.dumps(basepath))
+        return source.replace("{{ Revision }}", json.dumps(revision(manifest.encode("utf-8"))))
+
+    def write(self, output, basepath: str):
+        manifest = self.to_json(basepath)
+        output.write_bytes(MANIFEST_PATH, manifest.encode("utf-8"))
+        output.write_bytes(SERVICE_WORKER_PATH, self.service_worker(basepath, manifest).encode("utf-8"))
+        return len(list(self.included()))
+
+class RecordingOutput:
+    def __init__(self, output, manifest: PrecacheManifest):
+        self.output = output
+        self.manifest = manifest
+
+    def write_bytes(self, relpath: str, data: bytes):
+        self.manifest.add(relpath, data)
+        self.output.write_bytes(relpath, data)
+
+    def add_file(self, relpath: str, src_path: str, fs):
+        self.manifest.add_file(relpath, src_path, fs)
+        self.output.add_file(relpath, src_path, fs)
+
+    def close(self):
+        self.output.close()
+
+def record_tree(manifest: PrecacheManifest, src: str, fs, overrides: dict = None, include: set = None):
+    for root, _, files in fs.walk(src):
+        for file in files:
+            path = os.path.join(root, file)
+            relpath = os.path.relpath(path, src)
+            if include is not None and relpath.replace(os.sep, "/") not in include:
+                continue
+            if overrides and relpath in overrides:
+                manifest.add(relpath, overrides[relpath])
+            else:
+                manifest.add_file(relpath, path, fs)
+
+def register_script(basepath: str) -> str:
+    return f'<script>if ("serviceWorker" in navigator) navigator.serviceWorker.register("{basepath}{SERVICE_WORKER_PATH}");</script>'
+
+def inject_register_script(template: str, basepath: str) -> str:
+    return inject_head(template, register_script(basepath))
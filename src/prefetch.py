@@ -0,0 +1,91 @@
+import os
+from collections import Counter
+from textnode import EventType
+
+def collect_links(events, links: list):
+    for event in events:
+        if event[0] is EventType.SPAN and event[1] == "a":
+            links.append(event[3]["href"])
+        yield event
+
+def page_url(relative_html_path: str) -> str:
+    path = relative_html_path.replace(os.sep, "/")
+    if path == "index.html":
+        return "/"
+    if path.endswith("/index.html"):
+        return "/" + path[:-len("index.html")]
+    return "/" + path
+
+def page_url_aliases(relative_html_path: str):
+    url = page_url(relative_html_path)
+    if url.endswith("/"):
+        yield url
+        yield url + "index.html"
+        if url != "/":
+            yield url.rstrip("/")
+    else:
+        yield url
+        yield url[:-len(".html")]
+
+def link_path(href: str):
+    # Only root-relative links can name another page of this site.
+    if not href.startswith("/") or href.startswith("//"):
+        return None
+    return href.split("#", 1)[0].split("?", 1)[0]
+
+class LinkGraph:
+    def __init__(self, relative_html_paths):
+        self.pages = {}
+        for relpath in relative_html_paths:
+            for alias in page_url_aliases(relpath):
+                self.pages[alias] = relpath
+        self.outbound = {}
+        self.inbound = Counter()
+
+    def add_page(self, relpath: str, hrefs):
+        targets = Counter()
+        # The first URL each target is linked by, in document order; the
+        # hint must name the URL the browser will actually request.
+        urls = {}
+        for href in hrefs:
+            path = link_path(href)
+            target = self.pages.get(path) if path is not None else None
+            if target is None or target == relpath:
+                continue
+            targets[target] += 1
+            urls.setdefault(target, path)
+        self.outbound[relpath] = (targets, urls)
+        self.inbound.update(targets.keys())
+
+    def link_url(self, relpath: str, target: str) -> str:
+        return self.outbound[relpath][1][target]
+
+    def ranked_targets(self, relpath: str) -> list:
+        # Links repeated on the page come first, then pages the rest of
+        # the site links to most; ties keep document order.
+        targets, urls = self.outbound.get(relpath, (Counter(), {}))
+        order = {target: i for i, target in enumerate(urls)}
+        return sorted(targets, key=lambda target: (-targets[target], -self.inbound[target], order[target]))
+
+    def prefetch_targets(self, relpath: str, top_k: int, budget: int, sizes: dict) -> list:
+        chosen = []
+        spent = 0
+        for target in self.ranked_targets(relpath):
+            if len(chosen) >= top_k:
+                break
+            size = sizes.get(target, 0)
+            if budget and spent + size > budget:
+                continue
+            chosen.append(target)
+            spent += size
+        return chosen
+
+def prefetch_tags(urls, basepath: str) -> str:
+    return "\n    ".join(f'<link rel="prefetch" href="{basepath}{url.lstrip("/")}" />' for url in urls)
+
+def inject_head(template: str, tags: str) -> str:
+    if not tags:
+        return template
+    if "</head>" in template:
+        return template.replace("</head>", f"  {tags}\n  </head>", 1)
+    return tags + template
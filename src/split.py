@@ -0,0 +1,129 @@
+import os, re
+from events import render_html, render_text
+from htmlnode import escape_text
+from textnode import EventType
+
+HEADINGS = {"h1", "h2", "h3", "h4", "h5", "h6"}
+
+def slugify(text: str) -> str:
+    return re.sub(r"[^\w]+", "-", text.lower()).strip("-") or "section"
+
+def part_path(relative_html_path: str, number: int) -> str:
+    # The first part keeps the original path, so existing links still land
+    # on the start of the document.
+    if number == 1:
+        return relative_html_path
+    stem = os.path.splitext(relative_html_path)[0]
+    if os.path.basename(stem) == "index":
+        stem = os.path.dirname(stem)
+    return os.path.join(stem, str(number), "index.html")
+
+def part_url(relpath: str) -> str:
+    url = "/" + relpath.replace(os.sep, "/")
+    return url[:-len("index.html")] if url.endswith("/index.html") else url
+
+def top_level_sections(events: list) -> list:
+    # Children of the root <div>, grouped so each H2 starts a new section.
+    sections = [[]]
+    depth = 0
+    for event in events[1:-1]:
+        kind = event[0]
+        if kind is EventType.OPEN:
+            if depth == 0 and event[1] == "h2" and sections[-1]:
+                sections.append([])
+            depth += 1
+        elif kind is EventType.CLOSE:
+            depth -= 1
+        sections[-1].append(event)
+    return sections
+
+def pack_sections(sections: list, threshold: int) -> list:
+    parts = []
+    size = 0
+    for section in sections:
+        section_size = len(render_html(section).encode("utf-8"))
+        if parts and size + section_size <= threshold:
+            parts[-1].extend(section)
+            size += section_size
+        else:
+            parts.append(list(section))
+            size = section_size
+    return parts
+
+def heading_ids(parts: list):
+    ids = {}
+    seen = set()
+    for number, part in enumerate(parts, 1):
+        for i, event in enumerate(part):
+            if event[0] is EventType.OPEN and event[1] in HEADINGS:
+                close = next(j for j in range(i + 1, len(part)) if part[j][0] is EventType.CLOSE and part[j][1] == event[1])
+                slug = base = slugify(render_text(part[i + 1:close]))
+                suffix = 2
+                while slug in seen:
+                    slug = f"{base}-{suffix}"
+                    suffix += 1
+                seen.add(slug)
+                part[i] = (EventType.OPEN, event[1], {**(event[2] or {}), "id": slug})
+                ids[slug] = number
+    return ids
+
+def _heading_text(part: list, tag: str):
+    for i, event in enumerate(part):
+        if event[0] is EventType.OPEN and event[1] == tag:
+            close = next(j for j in range(i + 1, len(part)) if part[j][0] is EventType.CLOSE and part[j][1] == tag)
+            return render_text(part[i + 1:close]).strip()
+    return None
+
+def _index_html(urls: list, labels: list, current: int) -> str:
+    items = []
+    for number, (url, label) in enumerate(zip(urls, labels), 1):
+        if number == current:
+            items.append(f'<li aria-current="page">{escape_text(label)}</li>')
+        else:
+            items.append(f'<li><a href="{url}">{escape_text(label)}</a></li>')
+    return f'<nav class="page-index"><ol>{"".join(items)}</ol></nav>'
+
+def _pager_html(urls: list, labels: list, current: int) -> str:
+    links = []
+    if current > 1:
+        links.append(f'<a rel="prev" href="{urls[current - 2]}">&larr; {escape_text(labels[current - 2])}</a>')
+    if current < len(urls):
+        links.append(f'<a rel="next" href="{urls[current]}">{escape_text(labels[current])} &rarr;</a>')
+    return f'<nav class="page-nav">{"".join(links)}</nav>'
+
+def split_page(events: list, title: str, relative_html_path: str, threshold: int) -> list:
+    # Returns (relpath, plain title, html) for every output page; a page
+    # at or under the threshold comes back whole and unchanged.
+    html = render_html(events)
+    if len(html.encode("utf-8")) <= threshold:
+        return [(relative_html_path, title, html)]
+    parts = pack_sections(top_level_sections(events), threshold)
+    if len(parts) == 1:
+        return [(relative_html_path, title, html)]
+
+    ids = heading_ids(parts)
+    paths = [part_path(relative_html_path, number) for number in range(1, len(parts) + 1)]
+    urls = [part_url(path) for path in paths]
+    labels = [title] + [_heading_text(part, "h2") or f"Part {number}" for number, part in enumerate(parts[1:], 2)]
+
+    pages = []
+    for number, part in enumerate(parts, 1):
+        body = []
+        first_image = True
+        for event in part:
+            # Anchors that moved to another part now point at that part.
+            if event[0] is EventType.SPAN and event[1] == "a" and event[3]["href"].startswith("#"):
+                target = ids.get(event[3]["href"][1:])
+                if target is not None and target != number:
+                    event = (EventType.SPAN, "a", event[2], {**event[3], "href": urls[target - 1] + event[3]["href"]})
+            # Each part is its own page, so its first image is the one above
+            # the fold and must not be lazy-loaded.
+            elif event[0] is EventType.SPAN and event[1] == "img" and first_image:
+                first_image = False
+                event = (EventType.SPAN, "img", event[2], {key: value for key, value in event[3].items() if key != "loading"})
+            body.append(event)
+        content = render_html(body)
+        page_title = title if number == 1 else f"{title}: {labels[number - 1]}"
+        html = f"<div>{_index_html(urls, labels, number)}{content}{_pager_html(urls, labels, number)}</div>"
+        pages.append((paths[number - 1], page_title, html))
+    return pages
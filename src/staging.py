@@ -0,0 +1,108 @@
+import os, shutil, time
+
+def generations_dir(output_dir: str) -> str:
+    parent, name = os.path.split(os.path.abspath(output_dir))
+    return os.path.join(parent, f".{name}.generations")
+
+def list_generations(output_dir: str) -> list:
+    gens_dir = generations_dir(output_dir)
+    if not os.path.isdir(gens_dir):
+        return []
+    names = [name for name in os.listdir(gens_dir) if name.startswith("gen-")]
+    return [os.path.join(gens_dir, name) for name in sorted(names)]
+
+def current_generation(output_dir: str):
+    if not os.path.islink(output_dir):
+        return None
+    return os.path.realpath(output_dir)
+
+def _new_generation_path(output_dir: str, stamp: int = None, prefix: str = "gen-") -> str:
+    # Zero-padded so lexical order matches creation order.
+    stamp = time.time_ns() if stamp is None else stamp
+    return os.path.join(generations_dir(output_dir), f"{prefix}{stamp:020d}")
+
+def stage_generation(output_dir: str, seed: bool = False) -> str:
+    # Staged trees only get a "gen-" name once published, so a failed
+    # build can never be listed, kept or rolled back to.
+    staging = _new_generation_path(output_dir, prefix="staging-")
+    os.makedirs(os.path.dirname(staging), exist_ok=True)
+
+    current = current_generation(output_dir)
+    if current is None and os.path.isdir(output_dir):
+        current = output_dir
+
+    if seed and current is not None:
+        # Hardlinks make seeding cheap; writers must replace files rather
+        # than truncate them so the live generation is never modified.
+        shutil.copytree(current, staging, copy_function=os.link)
+    else:
+        os.mkdir(staging)
+    return staging
+
+def remove_unwritten(output_dir: str, staging: str) -> list:
+    # Every file a build writes replaces its seeded hardlink, so whatever
+    # still shares an inode with the live tree was not part of this build:
+    # its source was deleted or the asset was pruned.
+    current = current_generation(output_dir)
+    if current is None and os.path.isdir(output_dir):
+        current = output_dir
+    if current is None:
+        return []
+    removed = []
+    for root, dirs, files in os.walk(staging, topdown=False):
+        for file in files:
+            path = os.path.join(root, file)
+            relpath = os.path.relpath(path, staging)
+            live = os.path.join(current, relpath)
+            if os.path.exists(live) and os.path.samefile(path, live):
+                os.remove(path)
+                removed.append(relpath)
+        if root != staging and not os.listdir(root):
+            os.rmdir(root)
+    return sorted(removed)
+
+def _point_link_at(output_dir: str, target: str):
+    parent = os.path.dirname(os.path.abspath(output_dir))
+    tmp_link = f"{os.path.abspath(output_dir)}.tmp-link"
+    if os.path.lexists(tmp_link):
+        os.remove(tmp_link)
+    os.symlink(os.path.relpath(target, parent), tmp_link)
+    os.replace(tmp_link, output_dir)
+
+def publish_generation(output_dir: str, staging: str, keep: int = 3) -> str:
+    staged_at = int(os.path.basename(staging)[len("staging-"):])
+    if os.path.isdir(output_dir) and not os.path.islink(output_dir):
+        # First atomic build over a plain directory: keep it as a generation
+        # so it can be rolled back to, then switch to the symlink layout.
+        os.rename(output_dir, _new_generation_path(output_dir, staged_at - 1))
+
+    generation = _new_generation_path(output_dir, staged_at)
+    os.rename(staging, generation)
+    _point_link_at(output_dir, generation)
+    prune_generations(output_dir, keep)
+    return generation
+
+def discard_generation(staging: str):
+    if os.path.isdir(staging):
+        shutil.rmtree(staging)
+
+def prune_generations(output_dir: str, keep: int):
+    current = current_generation(output_dir)
+    previous = [gen for gen in list_generations(output_dir) if gen != current]
+    stale = previous[:-keep] if keep > 0 else previous
+    for gen in stale:
+        shutil.rmtree(gen)
+
+def rollback(output_dir: str, steps: int = 1) -> str:
+    generations = list_generations(output_dir)
+    current = current_generation(output_dir)
+    if current not in generations:
+        raise ValueError(f"{output_dir} is not managed by atomic builds")
+
+    index = generations.index(current) - steps
+    if index < 0:
+        raise ValueError(f"Only {generations.index(current)} previous generation(s) available")
+
+    target = generations[index]
+    _point_link_at(output_dir, target)
+    return target
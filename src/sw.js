@@ -0,0 +1,55 @@
+const BASEPATH = {{ Basepath }};
+const REVISION = {{ Revision }};
+const CACHE = "precache:" + BASEPATH;
+const REVISIONS = "precache-revisions:" + BASEPATH;
+
+function cacheKey(url) {
+  let path = url.pathname;
+  if (path.endsWith("/")) path += "index.html";
+  else if (!/\.[^\/]*$/.test(path)) path += "/index.html";
+  return url.origin + path;
+}
+
+async function storedRevisions() {
+  const response = await (await caches.open(REVISIONS)).match("revisions");
+  return response ? response.json() : {};
+}
+
+self.addEventListener("install", (event) => {
+  event.waitUntil((async () => {
+    const response = await fetch(BASEPATH + "precache-manifest.json?" + REVISION, { cache: "no-cache" });
+    const manifest = await response.json();
+    const previous = await storedRevisions();
+    const cache = await caches.open(CACHE);
+    const current = {};
+    // Only entries whose revision changed are downloaded again.
+    await Promise.all(manifest.map(async (entry) => {
+      const key = cacheKey(new URL(entry.url, self.location));
+      current[key] = entry.revision;
+      if (previous[key] === entry.revision && (await cache.match(key))) return;
+      const fresh = await fetch(entry.url, { cache: "no-cache" });
+      if (fresh.ok) await cache.put(key, fresh);
+      else delete current[key];
+    }));
+    for (const key of Object.keys(previous)) {
+      if (!(key in current)) await cache.delete(key);
+    }
+    await (await caches.open(REVISIONS)).put("revisions", new Response(JSON.stringify(current)));
+    await self.skipWaiting();
+  })());
+});
+
+self.addEventListener("activate", (event) => {
+  event.waitUntil(self.clients.claim());
+});
+
+self.addEventListener("fetch", (event) => {
+  const request = event.request;
+  if (request.method !== "GET") return;
+  const url = new URL(request.url);
+  if (url.origin !== self.location.origin || !url.pathname.startsWith(BASEPATH)) return;
+  event.respondWith((async () => {
+    const cached = await (await caches.open(CACHE)).match(cacheKey(url));
+    return cached || fetch(request);
+  })());
+});
@@ -0,0 +1,115 @@
+import os
+import struct
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from buildcache import BuildCache, LocalDirBackend, HTTPBackend, cache_key
+from fixtures import memory_site, setUpModule, tearDownModule
+from main import generate_pages_for_targets, generate_pages_recursive
+
+class StandInCacheHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        data = self.server.store.get(self.path)
+        self.server.gets += 1
+        if data is None:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_PUT(self):
+        length = int(self.headers["Content-Length"])
+        self.server.store[self.path] = self.rfile.read(length)
+        self.send_response(201)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+class TestCacheKey(unittest.TestCase):
+    def test_every_input_changes_the_key(self):
+        base = cache_key("src", "tpl", "/")
+        self.assertNotEqual(base, cache_key("src2", "tpl", "/"))
+        self.assertNotEqual(base, cache_key("src", "tpl2", "/"))
+        self.assertNotEqual(base, cache_key("src", "tpl", "/site/"))
+        self.assertNotEqual(base, cache_key("src", "tpl", "/", "images"))
+        self.assertNotEqual(base, cache_key("src", "tpl", "/", parser_version="0"))
+
+class TestBackends(unittest.TestCase):
+    def test_local_dir_round_trip(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            backend = LocalDirBackend(tmp)
+            self.assertIsNone(backend.get("ab" * 32))
+            backend.put("ab" * 32, b"page")
+            self.assertEqual(backend.get("ab" * 32), b"page")
+
+    def test_http_round_trip_and_prefetch(self):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), StandInCacheHandler)
+        server.store, server.gets = {}, 0
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        try:
+            backend = HTTPBackend(f"http://127.0.0.1:{server.server_port}/cache")
+            self.assertIsNone(backend.get("missing"))
+            backend.put("k1", b"one")
+
+            cache = BuildCache(backend)
+            cache.prefetch(["k1", "k2", "k1"])
+            gets = server.gets
+            self.assertEqual(cache.get("k1"), b"one")
+            self.assertIsNone(cache.get("k2"))
+            self.assertEqual(server.gets, gets)
+            self.assertEqual((cache.hits, cache.misses), (1, 1))
+        finally:
+            server.shutdown()
+            thread.join()
+            server.server_close()
+
+    def test_unreachable_backend_is_a_miss(self):
+        cache = BuildCache(HTTPBackend("http://127.0.0.1:9", timeout=0.5))
+        cache.prefetch(["k"])
+        self.assertIsNone(cache.get("k"))
+
+class TestCachedBuild(unittest.TestCase):
+    def test_second_build_is_served_from_cache(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            content = os.path.join(tmp, "content")
+            os.mkdir(content)
+            with open(os.path.join(content, "index.md"), "w") as f:
+                f.write("# Home\n\n[About](/about)")
+            template = os.path.join(tmp, "template.html")
+            with open(template, "w") as f:
+                f.write("<title>{{ Title }}</title>{{ Content }}")
+
+            cache = BuildCache(LocalDirBackend(os.path.join(tmp, "cache")))
+            generate_pages_recursive(content, template, os.path.join(tmp, "one"), "/site/", build_cache=cache)
+            cache = BuildCache(LocalDirBackend(os.path.join(tmp, "cache")))
+            generate_pages_recursive(content, template, os.path.join(tmp, "two"), "/site/", build_cache=cache)
+
+            self.assertEqual((cache.hits, cache.misses), (1, 0))
+            with open(os.path.join(tmp, "two", "index.html")) as f:
+                self.assertEqual(
+                    f.read(),
+                    '<title>Home</title><div><h1>Home</h1><p><a href="/site/about">About</a></p></div>',
+                )
+
+    def test_resized_image_is_a_miss(self):
+        def png(width, height):
+            return b"\x89PNG\r\n\x1a\n\0\0\0\rIHDR" + struct.pack(">II", width, height)
+
+        fs = memory_site({"content/index.md": "# Home\n\n![a](/a.png)", "static/a.png": png(10, 10)})
+        with tempfile.TemporaryDirectory() as tmp:
+            for size in ((10, 10), (20, 30)):
+                fs.write_bytes("static/a.png", png(*size))
+                cache = BuildCache(LocalDirBackend(tmp))
+                generate_pages_for_targets("content", "template.html", [("/", "out")], "static", build_cache=cache, fs=fs)
+        self.assertEqual((cache.hits, cache.misses), (0, 1))
+        self.assertIn('width="20" height="30"', fs.read_text("out/index.html"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,131 @@
+import io, json, os, tempfile, threading, unittest
+from contextlib import redirect_stdout
+
+import buildlog
+from buildlog import DEBUG, INFO, BuildLog, Progress, format_duration
+
+class TestProgress(unittest.TestCase):
+    def test_line_with_total(self):
+        progress = Progress("Generating pages", 100)
+        for _ in range(25):
+            progress.advance()
+        self.assertEqual(progress.line(progress.started + 5), "Generating pages: 25/100 (25%, 5/s, ETA 15s)")
+
+    def test_line_without_total(self):
+        progress = Progress("Copying static files")
+        progress.advance()
+        self.assertEqual(progress.line(progress.started + 0.5), "Copying static files: 1 (2/s)")
+
+    def test_format_duration(self):
+        self.assertEqual(format_duration(4.6), "5s")
+        self.assertEqual(format_duration(125), "2m05s")
+        self.assertEqual(format_duration(7260), "2h01m")
+
+class TestBuildLog(unittest.TestCase):
+    def test_debug_is_off_by_default(self):
+        output = io.StringIO()
+        with redirect_stdout(output):
+            log = BuildLog()
+            log.log(DEBUG, "copy", "Copied file: a")
+            log.log(INFO, "pages", "Generated pages")
+            log.close()
+        self.assertEqual(output.getvalue(), "Generated pages\n")
+
+    def test_debug_is_buffered(self):
+        output = io.StringIO()
+        with redirect_stdout(output):
+            log = BuildLog(DEBUG, buffer_records=3)
+            log.log(DEBUG, "copy", "one")
+            log.log(DEBUG, "copy", "two")
+            self.assertEqual(output.getvalue(), "")
+            log.log(DEBUG, "copy", "three")
+            self.assertEqual(output.getvalue(), "one\ntwo\nthree\n")
+            log.log(DEBUG, "copy", "four")
+            log.close()
+        self.assertEqual(output.getvalue(), "one\ntwo\nthree\nfour\n")
+
+    def test_json_lines(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "build.jsonl")
+            with redirect_stdout(io.StringIO()):
+                log = BuildLog(DEBUG, path)
+                log.log(DEBUG, "copy", "Copied file: a", src="a")
+                log.close()
+            with open(path) as f:
+                records = [json.loads(line) for line in f]
+        self.assertEqual(len(records), 1)
+        self.assertEqual(
+            {key: value for key, value in records[0].items() if key != "time"},
+            {"level": "debug", "event": "copy", "message": "Copied file: a", "src": "a"},
+        )
+
+    def test_progress_summary(self):
+        output = io.StringIO()
+        with redirect_stdout(output):
+            log = BuildLog(progress=True)
+            log.start("Generating pages", 2)
+            log.advance()
+            log.advance()
+            log.finish("pages", "Generated pages")
+            log.close()
+        # The progress line is erased before the summary is written.
+        self.assertRegex(output.getvalue(), r"\r +\rGenerated pages: 2 in \d+\.\d\ds\n$")
+
+    def test_threads_keep_every_record(self):
+        output = io.StringIO()
+        with redirect_stdout(output):
+            log = BuildLog(DEBUG, buffer_records=7)
+            log.start("Copying", 400)
+
+            def work(n):
+                for i in range(100):
+                    log.log(DEBUG, "copy", f"{n}-{i}")
+                    log.advance()
+
+            threads = [threading.Thread(target=work, args=(n,)) for n in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            log.finish("static", "Copied")
+            log.close()
+        lines = output.getvalue().splitlines()
+        self.assertEqual(sorted(lines[:-1]), sorted(f"{n}-{i}" for n in range(4) for i in range(100)))
+        self.assertTrue(lines[-1].startswith("Copied: 400 in "))
+
+    def test_flush_from_another_thread_keeps_every_record(self):
+        output = io.StringIO()
+        with redirect_stdout(output):
+            log = BuildLog(DEBUG, buffer_records=5)
+            done = threading.Event()
+
+            def work():
+                for i in range(2000):
+                    log.log(DEBUG, "copy", str(i))
+                done.set()
+
+            thread = threading.Thread(target=work)
+            thread.start()
+            while not done.is_set():
+                log.flush()
+            thread.join()
+            log.close()
+        self.assertEqual(sorted(output.getvalue().splitlines(), key=int), [str(i) for i in range(2000)])
+
+    def test_configure_log(self):
+        previous = buildlog.get_log()
+        try:
+            output = io.StringIO()
+            with redirect_stdout(output):
+                buildlog.configure_log(INFO, "-")
+                buildlog.info("pages", "Generated pages", count=3)
+                buildlog.error("publish", "Publish failed")
+                buildlog.get_log().close()
+            records = [json.loads(line) for line in output.getvalue().splitlines()]
+            self.assertEqual((records[0]["message"], records[0]["count"]), ("Generated pages", 3))
+            self.assertEqual((records[1]["level"], records[1]["message"]), ("error", "Publish failed"))
+        finally:
+            buildlog._log = previous
+
+if __name__ == "__main__":
+    unittest.main()
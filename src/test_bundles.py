@@ -0,0 +1,97 @@
+import io
+import json
+import os
+import tarfile
+import tempfile
+import unittest
+import zipfile
+
+from bundles import bundle_format, page_path, read_bundle
+from fixtures import setUpModule, tearDownModule
+from main import generate_pages_for_targets
+from vfs import MemoryFS
+
+PAGES = {"index.md": "# Home", "blog/post.md": "# Post\n\nHello"}
+
+class TestBundles(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.tmp.name, name)
+
+    def write_jsonl(self, entries, name="pages.jsonl"):
+        with open(self.path(name), "w") as f:
+            for entry in entries:
+                f.write(json.dumps(entry) + "\n")
+        return self.path(name)
+
+    def pages(self, path):
+        return sorted((relpath, content) for _, relpath, content in read_bundle(path))
+
+    def expected(self):
+        return sorted((os.path.splitext(name)[0] + ".html", content) for name, content in PAGES.items())
+
+    def test_jsonl(self):
+        path = self.write_jsonl([{"path": name, "content": content} for name, content in PAGES.items()])
+        self.assertEqual(self.pages(path), self.expected())
+
+    def test_tar(self):
+        path = self.path("pages.tar.gz")
+        with tarfile.open(path, "w:gz") as archive:
+            for name, content in PAGES.items():
+                data = content.encode("utf-8")
+                info = tarfile.TarInfo("./" + name)
+                info.size = len(data)
+                archive.addfile(info, io.BytesIO(data))
+            archive.addfile(tarfile.TarInfo("notes.txt"), io.BytesIO(b""))
+        self.assertEqual(self.pages(path), self.expected())
+
+    def test_zip(self):
+        path = self.path("pages.zip")
+        with zipfile.ZipFile(path, "w") as archive:
+            for name, content in PAGES.items():
+                archive.writestr(name, content)
+        self.assertEqual(self.pages(path), self.expected())
+
+    def test_format(self):
+        self.assertEqual(bundle_format("a.ndjson.gz"), "jsonl")
+        self.assertEqual(bundle_format("a.tgz"), "tar")
+        with self.assertRaises(ValueError):
+            bundle_format("a.json")
+
+    def test_rejects_paths_outside_site(self):
+        for bad in ("../x.md", "/etc/x.md", "a/../../x.md", ""):
+            with self.assertRaises(ValueError):
+                page_path(bad)
+        self.assertEqual(page_path("./a//b.md"), "a/b.html")
+
+    def test_rejects_duplicates_and_bad_lines(self):
+        path = self.write_jsonl([{"path": "a.md", "content": ""}, {"path": "./a.md", "content": ""}])
+        with self.assertRaises(ValueError):
+            list(read_bundle(path))
+        path = self.write_jsonl([{"content": "# x"}], "bad.jsonl")
+        with self.assertRaisesRegex(ValueError, "bad.jsonl:1"):
+            list(read_bundle(path))
+
+    def test_build_from_bundle_streams_pages(self):
+        fs = MemoryFS({"template.html": "<title>{{ Title }}</title>{{ Content }}"})
+        path = self.write_jsonl([{"path": name, "content": content} for name, content in PAGES.items()])
+        written = []
+
+        def pages():
+            for page in read_bundle(path):
+                # Each page is rendered before the next is read.
+                written.append(sorted(name for _, _, files in fs.walk("out") for name in files))
+                yield page
+
+        generate_pages_for_targets(None, "template.html", [("/", "out")], pages=pages(), fs=fs)
+        self.assertEqual(written, [[], ["index.html"]])
+        self.assertEqual(fs.read_text("out/blog/post.html"), "<title>Post</title><div><h1>Post</h1><p>Hello</p></div>")
+        self.assertFalse(fs.exists("content"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import os
+import tempfile
+import unittest
+
+from css import minify_css, inline_stylesheets
+
+TEMPLATE = '<head>\n    <link href="/index.css" rel="stylesheet" />\n</head>'
+
+class TestMinifyCss(unittest.TestCase):
+    def test_minify(self):
+        css = "/* theme */\nbody {\n  color: #fff;\n  margin: 0 auto;\n}\n\nh1,\nh2 {\n  color: red;\n}\n"
+        self.assertEqual(minify_css(css), "body{color:#fff;margin:0 auto}h1,h2{color:red}")
+
+    def test_descendant_pseudo_class_is_kept(self):
+        self.assertEqual(minify_css("a :hover { color: red; }"), "a :hover{color:red}")
+
+    def test_strings_are_kept_verbatim(self):
+        css = 'a::before {\n  content: "a  b /* c */";\n}\n/* note */\nb::after { content: \'x ; y\'; }'
+        self.assertEqual(minify_css(css), 'a::before{content:"a  b /* c */"}b::after{content:\'x ; y\'}')
+
+class TestInlineStylesheets(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        with open(os.path.join(self.tmp.name, "index.css"), "w") as f:
+            f.write("body {\n  background: url(/images/bg.png);\n}\n")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_small_stylesheet_is_inlined(self):
+        html = inline_stylesheets(TEMPLATE, self.tmp.name, 1024, "/site/")
+        self.assertEqual(html, "<head>\n    <style>body{background:url(/site/images/bg.png)}</style>\n</head>")
+
+    def test_relative_urls_resolve_against_the_stylesheet(self):
+        os.mkdir(os.path.join(self.tmp.name, "css"))
+        with open(os.path.join(self.tmp.name, "css", "theme.css"), "w") as f:
+            f.write("a { background: url(img/x.png); }\nb { src: url('../fonts/f.woff'); }\nc { background: url(data:image/gif;base64,R0lG); }")
+        template = '<link href="/css/theme.css" rel="stylesheet" />'
+        self.assertEqual(
+            inline_stylesheets(template, self.tmp.name, 1024, "/site/"),
+            "<style>a{background:url(/site/css/img/x.png)}b{src:url('/site/fonts/f.woff')}"
+            "c{background:url(data:image/gif;base64,R0lG)}</style>",
+        )
+
+    def test_large_stylesheet_is_preloaded(self):
+        html = inline_stylesheets(TEMPLATE, self.tmp.name, 10)
+        self.assertEqual(
+            html,
+            '<head>\n    <link rel="preload" href="/index.css" as="style" />\n'
+            '    <link href="/index.css" rel="stylesheet" />\n</head>',
+        )
+
+    def test_missing_or_remote_stylesheets_are_left_alone(self):
+        template = '<link href="/missing.css" rel="stylesheet" /><link href="https://cdn/x.css" rel="stylesheet" />'
+        self.assertEqual(inline_stylesheets(template, self.tmp.name, 1024), template)
+
+if __name__ == "__main__":
+    unittest.main()
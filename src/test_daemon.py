@@ -0,0 +1,99 @@
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from contextlib import redirect_stdout
+from unittest import mock
+
+import client
+from daemon import check_import_budget, daemon_running
+from fixtures import write
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+
+class TestImportBudget(unittest.TestCase):
+    def test_main_imports_within_budget(self):
+        self.assertLess(check_import_budget(1000.0), 1000.0)
+
+    def test_over_budget_raises(self):
+        with self.assertRaises(RuntimeError):
+            check_import_budget(0.0)
+
+class TestBuildDaemon(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        write(os.path.join(root, "static", "index.css"), "body {}")
+        write(os.path.join(root, "content", "index.md"), "# Home\n\nHello")
+        write(os.path.join(root, "template.html"), "<title>{{ Title }}</title>{{ Content }}")
+
+        self.socket = os.path.join(root, "build.sock")
+        self.daemon = subprocess.Popen(
+            [sys.executable, "daemon.py", "--socket", self.socket, "--import-budget-ms", "5000"],
+            cwd=SRC_DIR, stdout=subprocess.DEVNULL,
+        )
+        # The socket file appears at bind(), slightly before listen().
+        deadline = time.monotonic() + 10
+        while not self.accepting():
+            if time.monotonic() > deadline or self.daemon.poll() is not None:
+                self.fail("serve-build did not start")
+            time.sleep(0.02)
+
+    def accepting(self):
+        return daemon_running(self.socket)
+
+    def tearDown(self):
+        client.request({"command": "shutdown"}, self.socket)
+        self.daemon.wait(timeout=10)
+        self.tmp.cleanup()
+
+    def build(self, argv):
+        output = io.StringIO()
+        with redirect_stdout(output):
+            status = client.request(
+                {"command": "build", "argv": argv, "cwd": self.tmp.name},
+                self.socket,
+            )
+        return status, output.getvalue()
+
+    def test_build_over_socket(self):
+        status, output = self.build(["--output", "out", "--cache-dir", ""])
+        self.assertEqual(status, 0)
+        self.assertIn("Generated pages: 1 in", output)
+        self.assertNotIn("Generating page", output)
+        with open(os.path.join(self.tmp.name, "out", "index.html")) as f:
+            self.assertEqual(f.read(), "<title>Home</title><div><h1>Home</h1><p>Hello</p></div>")
+
+    def test_daemon_stays_up_between_builds(self):
+        for _ in range(2):
+            status, _ = self.build(["--output", "out", "--cache-dir", ""])
+            self.assertEqual(status, 0)
+        self.assertIsNone(self.daemon.poll())
+
+    def test_bad_arguments_report_exit_status(self):
+        status, output = self.build(["--no-such-flag"])
+        self.assertEqual(status, 2)
+        self.assertIn("unrecognized arguments", output)
+
+    def test_second_daemon_leaves_the_socket_alone(self):
+        second = subprocess.run(
+            [sys.executable, "daemon.py", "--socket", self.socket, "--import-budget-ms", "5000"],
+            cwd=SRC_DIR, capture_output=True, text=True, timeout=30,
+        )
+        self.assertNotEqual(second.returncode, 0)
+        self.assertIn("already running", second.stderr)
+        self.assertTrue(self.accepting())
+
+class TestClient(unittest.TestCase):
+    def test_shutdown_without_daemon(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            output = io.StringIO()
+            with mock.patch.dict(os.environ, {"SSG_SOCKET": os.path.join(tmp, "build.sock")}), redirect_stdout(output):
+                self.assertEqual(client.main(["--shutdown"]), 1)
+        self.assertEqual(output.getvalue(), "no daemon running\n")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+import os
+import unittest
+
+from textnode import EventType
+from unittest import mock
+
+from functions import markdown_to_events, markdown_to_html_node, text_node_to_html_node, text_to_events, text_to_textnodes
+from events import render_html, render_text, count_words
+
+CONTENT_DIR = os.path.join(os.path.dirname(__file__), "..", "content")
+
+class TestMarkdownToEvents(unittest.TestCase):
+    def test_event_sequence(self):
+        events = list(markdown_to_events("# Hi\n\n- **a**\n- [b](/b)"))
+        self.assertEqual(events, [
+            (EventType.OPEN, "div", None),
+            (EventType.OPEN, "h1", None),
+            (EventType.TEXT, "Hi"),
+            (EventType.CLOSE, "h1"),
+            (EventType.OPEN, "ul", None),
+            (EventType.OPEN, "li", None),
+            (EventType.SPAN, "b", "a", None),
+            (EventType.CLOSE, "li"),
+            (EventType.OPEN, "li", None),
+            (EventType.SPAN, "a", "b", {"href": "/b"}),
+            (EventType.CLOSE, "li"),
+            (EventType.CLOSE, "ul"),
+            (EventType.CLOSE, "div"),
+        ])
+
+    def test_render_matches_node_tree(self):
+        for root, _, files in os.walk(CONTENT_DIR):
+            for file in files:
+                with open(os.path.join(root, file)) as f:
+                    md = f.read()
+                self.assertEqual(
+                    render_html(markdown_to_events(md)),
+                    markdown_to_html_node(md).to_html(),
+                )
+
+    def test_inline_events_match_text_nodes(self):
+        for text in [
+            "plain", "", "**b** and _i_ and `c`", "a [link](/x) and ![img](/i.png)",
+            "_**mixed**_", "**bold with `code`**", "odd ** count", "`**`", "**empty** ****",
+            "[a](/b) `[c](/d)` ![e](f g)",
+        ]:
+            with mock.patch("functions.text_to_textnodes", side_effect=AssertionError):
+                html = render_html(text_to_events(text))
+            expected = "".join(text_node_to_html_node(node).to_html() for node in text_to_textnodes(text))
+            self.assertEqual(html, expected, text)
+
+class TestEventConsumers(unittest.TestCase):
+    def test_render_text(self):
+        md = "# Title\n\nSome **bold** & [linked](/x) text\n\n```\ncode <here>\n```"
+        self.assertEqual(
+            render_text(markdown_to_events(md)),
+            "Title\nSome bold & linked text\ncode <here>\n\n",
+        )
+
+    def test_count_words(self):
+        md = "# Two words\n\nThree **bo**ld words_ here\n\n- one\n- two"
+        self.assertEqual(count_words(markdown_to_events(md)), 8)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import json
+import unittest
+
+from buildcache import BuildCache
+from fixtures import TEMPLATE, memory_site, setUpModule, tearDownModule
+from fragments import fragment_path, inject_nav_script, render_fragment
+from main import generate_pages_for_targets
+
+class MemoryBackend:
+    def __init__(self):
+        self.store = {}
+
+    def get(self, key):
+        return self.store.get(key)
+
+    def put(self, key, data):
+        self.store[key] = data
+
+class TestFragments(unittest.TestCase):
+    pages = {
+        "content/index.md": "# Home\n\n[Post](/blog/post)",
+        "content/blog/post/index.md": "# Fish & Chips\n\nTasty",
+    }
+
+    def test_fragment_path(self):
+        self.assertEqual(fragment_path("blog/post/index.html"), "blog/post/index.frag.json")
+
+    def test_render_fragment_keeps_plain_title(self):
+        fragment = json.loads(render_fragment("Fish & Chips", "<p>x</p>"))
+        self.assertEqual(fragment, {"title": "Fish & Chips", "content": "<p>x</p>"})
+
+    def test_inject_nav_script_into_head(self):
+        html = inject_nav_script(TEMPLATE)
+        self.assertIn('<script src="/nav.js" defer></script>\n  </head>', html)
+
+    def test_build_writes_fragments(self):
+        fs = memory_site(self.pages)
+        generate_pages_for_targets("content", "template.html", [("/site/", "out")], fragments=True, fs=fs)
+        fragment = json.loads(fs.read_text("out/blog/post/index.frag.json"))
+        self.assertEqual(fragment["title"], "Fish & Chips")
+        self.assertEqual(fragment["content"], "<div><h1>Fish &amp; Chips</h1><p>Tasty</p></div>")
+        self.assertIn('href="/site/blog/post"', json.loads(fs.read_text("out/index.frag.json"))["content"])
+        self.assertIn('<script src="/site/nav.js" defer></script>', fs.read_text("out/index.html"))
+        self.assertTrue(fs.isfile("out/nav.js"))
+
+    def test_build_without_fragments_is_unchanged(self):
+        fs = memory_site(self.pages)
+        generate_pages_for_targets("content", "template.html", [("/", "out")], fs=fs)
+        self.assertFalse(fs.exists("out/index.frag.json"))
+        self.assertFalse(fs.exists("out/nav.js"))
+        self.assertNotIn("<script", fs.read_text("out/index.html"))
+
+    def test_fragments_restored_from_cache(self):
+        backend = MemoryBackend()
+        first, second = memory_site(self.pages), memory_site(self.pages)
+        generate_pages_for_targets("content", "template.html", [("/", "out")], build_cache=BuildCache(backend), fragments=True, fs=first)
+        cache = BuildCache(backend)
+        generate_pages_for_targets("content", "template.html", [("/", "out")], build_cache=cache, fragments=True, fs=second)
+        self.assertEqual(cache.misses, 0)
+        self.assertEqual(cache.hits, 4)
+        self.assertEqual(first.read_bytes("out/index.frag.json"), second.read_bytes("out/index.frag.json"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import tempfile
+import unittest
+
+from highlight import HighlightCache, tokenize, resolve_language
+from functions import markdown_to_html_node
+
+class TestTokenize(unittest.TestCase):
+    def test_tokens_cover_input(self):
+        code = 'def greet(name):\n    # say hi\n    return "hi " + name * 2\n'
+        tokens = tokenize(code, "python")
+        self.assertEqual("".join(text for _, text in tokens), code)
+        self.assertIn(("kw", "def"), tokens)
+        self.assertIn(("com", "# say hi"), tokens)
+        self.assertIn(("str", '"hi "'), tokens)
+        self.assertIn(("num", "2"), tokens)
+
+    def test_aliases(self):
+        self.assertEqual(resolve_language("py"), "python")
+        self.assertEqual(resolve_language("JS"), "javascript")
+        self.assertIsNone(resolve_language("cobol"))
+        self.assertIsNone(resolve_language(None))
+
+class TestHighlightCache(unittest.TestCase):
+    def test_memory_hit(self):
+        cache = HighlightCache()
+        first = cache.get("x = 1", "python")
+        second = cache.get("x = 1", "python")
+        self.assertIs(first, second)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_lru_eviction(self):
+        cache = HighlightCache(max_entries=2)
+        for code in ("a", "b", "c"):
+            cache.get(code, "python")
+        self.assertEqual(len(cache.entries), 2)
+        self.assertNotIn(cache.key("a", "python"), cache.entries)
+
+    def test_disk_cache_survives_new_instance(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            HighlightCache(cache_dir=tmp).get("print(1)", "python")
+            cache = HighlightCache(cache_dir=tmp)
+            tokens = cache.get("print(1)", "python")
+            self.assertEqual((cache.hits, cache.misses), (1, 0))
+            self.assertEqual(tokens, tokenize("print(1)", "python"))
+
+class TestCodeBlockHighlighting(unittest.TestCase):
+    def test_fenced_language(self):
+        md = "```python\nreturn 1\n```"
+        html = markdown_to_html_node(md).to_html()
+        self.assertEqual(
+            html,
+            '<div><pre><code class="language-python"><span class="tok-kw">return</span> '
+            '<span class="tok-num">1</span>\n</code></pre></div>',
+        )
+
+    def test_unknown_language_is_plain(self):
+        md = "```cobol\nDISPLAY 'HI'\n```"
+        html = markdown_to_html_node(md).to_html()
+        self.assertEqual(html, "<div><pre><code class=\"language-cobol\">DISPLAY 'HI'\n</code></pre></div>")
+
+if __name__ == "__main__":
+    unittest.main()
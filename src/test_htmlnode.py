@@ -1,7 +1,10 @@
+import random
+import re
+import time
 import unittest
 
 from textnode import TextNode, TextType, BlockType
-from htmlnode import HTMLNode, LeafNode, ParentNode
+from htmlnode import HTMLNode, LeafNode, ParentNode, escape_text, escape_attr
 from functions import (
     split_nodes_delimiter, 
     extract_markdown_images, 
@@ -11,7 +14,9 @@ from functions import (
     markdown_to_blocks, 
     block_to_block_type, 
     markdown_to_html_node, 
-    extract_title
+    extract_title,
+    iter_bracket_matches,
+    text_to_textnodes,
     )
 
 class TestHTMLNode(unittest.TestCase):
@@ -62,6 +67,33 @@ class TestLeafNode(unittest.TestCase):
         node = LeafNode("br", "")
         self.assertEqual(node.to_html(), "<br></br>")
 
+class TestEscaping(unittest.TestCase):
+    def test_leaf_text_is_escaped(self):
+        node = LeafNode("p", "1 < 2 & 3 > 2")
+        self.assertEqual(node.to_html(), "<p>1 &lt; 2 &amp; 3 &gt; 2</p>")
+
+    def test_plain_text_is_returned_unchanged(self):
+        text = "Nothing to see here"
+        self.assertIs(escape_text(text), text)
+
+    def test_attribute_quotes_are_escaped(self):
+        node = LeafNode("img", "", {"src": "a.png?x=1&y=2", "alt": 'The "One" Ring'})
+        self.assertEqual(
+            node.to_html(),
+            '<img src="a.png?x=1&amp;y=2" alt="The &quot;One&quot; Ring"></img>',
+        )
+
+    def test_non_string_attribute(self):
+        self.assertEqual(escape_attr(720), "720")
+        self.assertEqual(LeafNode("img", "", {"width": 720}).props_to_html(), ' width="720"')
+
+    def test_code_block_escaped_once(self):
+        md = "```\nif a < b && c:\n```"
+        self.assertEqual(
+            markdown_to_html_node(md).to_html(),
+            "<div><pre><code>if a &lt; b &amp;&amp; c:\n</code></pre></div>",
+        )
+
 class TestParentNode(unittest.TestCase):
 
     def test_to_html_with_children(self):
@@ -366,6 +398,35 @@ class TestSplitMarkdownNodes(unittest.TestCase):
         new_nodes = split_nodes_link([node])
         self.assertListEqual([node], new_nodes)
 
+class TestInlineLinearTime(unittest.TestCase):
+    PATTERNS = {
+        (True, False): r"!\[([^\]]+)\]\(([^)]+)\)",
+        (False, False): r"(?<!!)\[([^\]]+)\]\(([^)]+)\)",
+        (True, True): r"!\[([^\]]+)\]\(([^()\s]+)\)",
+        (False, True): r"(?<!!)\[([^\]]+)\]\(([^()\s]+)\)",
+    }
+
+    def test_scanner_matches_reference_regexes(self):
+        rng = random.Random(0)
+        for _ in range(3000):
+            text = "".join(rng.choice("![]() a\n") for _ in range(rng.randint(0, 16)))
+            for (image, strict_url), pattern in self.PATTERNS.items():
+                expected = [(m.start(), m.end(), m.group(1), m.group(2)) for m in re.finditer(pattern, text)]
+                self.assertEqual(list(iter_bracket_matches(text, image, strict_url)), expected, repr(text))
+
+    def test_unmatched_link_prefixes_scale_linearly(self):
+        def best(text):
+            timings = []
+            for _ in range(3):
+                start = time.perf_counter()
+                text_to_textnodes(text)
+                timings.append(time.perf_counter() - start)
+            return min(timings)
+
+        small, large = best("[a](" * 4000), best("[a](" * 16000)
+        # 4x the input: linear is ~4x, quadratic would be ~16x.
+        self.assertLess(large / small, 8)
+
 class TestMarkdownToBlocks(unittest.TestCase):
     def test_markdown_to_blocks(self):
         md = """
@@ -0,0 +1,96 @@
+import os
+import struct
+import tempfile
+import unittest
+from unittest import mock
+
+from textnode import EventType
+from functions import markdown_to_events
+from images import read_image_size, annotate_images, ImageSizeCache, configure_cache
+
+def png_header(width, height):
+    return b"\x89PNG\r\n\x1a\n" + struct.pack(">I", 13) + b"IHDR" + struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+
+def gif_header(width, height):
+    return b"GIF89a" + struct.pack("<HH", width, height) + b"\x00" * 8
+
+def jpeg_header(width, height):
+    app0 = b"\xff\xe0" + struct.pack(">H", 16) + b"JFIF\x00" + b"\x00" * 9
+    sof = b"\xff\xc0" + struct.pack(">HBHHB", 11, 8, height, width, 1) + b"\x01\x11\x00"
+    return b"\xff\xd8" + app0 + sof + b"\xff\xd9"
+
+def webp_vp8x_header(width, height):
+    body = b"VP8X" + struct.pack("<I", 10) + b"\x00" * 4
+    body += (width - 1).to_bytes(3, "little") + (height - 1).to_bytes(3, "little")
+    return b"RIFF" + struct.pack("<I", len(body) + 4) + b"WEBP" + body
+
+def webp_vp8l_header(width, height):
+    bits = (width - 1) | ((height - 1) << 14)
+    body = b"VP8L" + struct.pack("<I", 5) + b"\x2f" + bits.to_bytes(4, "little")
+    return b"RIFF" + struct.pack("<I", len(body) + 4) + b"WEBP" + body
+
+class TestReadImageSize(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, data):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+    def test_formats(self):
+        cases = {
+            "a.png": (png_header(1079, 720), (1079, 720)),
+            "a.gif": (gif_header(32, 16), (32, 16)),
+            "a.jpg": (jpeg_header(640, 480), (640, 480)),
+            "a.webp": (webp_vp8x_header(300, 200), (300, 200)),
+            "b.webp": (webp_vp8l_header(17, 9), (17, 9)),
+        }
+        for name, (data, expected) in cases.items():
+            with self.subTest(name=name):
+                self.assertEqual(read_image_size(self.write(name, data)), expected)
+
+    def test_unknown_format(self):
+        self.assertIsNone(read_image_size(self.write("a.txt", b"not an image")))
+
+    def test_cache_is_keyed_by_stat(self):
+        cache_path = os.path.join(self.tmp.name, "sizes.json")
+        path = self.write("a.png", png_header(10, 20))
+        cache = ImageSizeCache(cache_path)
+        cache.get(path)
+        cache.save()
+
+        reloaded = ImageSizeCache(cache_path)
+        with mock.patch("images.read_image_size") as read:
+            self.assertEqual(reloaded.get(path), (10, 20))
+        read.assert_not_called()
+
+        self.write("a.png", png_header(30, 40) + b"\0")
+        self.assertEqual(reloaded.get(path), (30, 40))
+
+class TestAnnotateImages(unittest.TestCase):
+    def test_first_image_stays_eager(self):
+        configure_cache(None)
+        with tempfile.TemporaryDirectory() as static_dir:
+            os.mkdir(os.path.join(static_dir, "images"))
+            with open(os.path.join(static_dir, "images", "a.png"), "wb") as f:
+                f.write(png_header(1079, 720))
+
+            md = "![one](/images/a.png)\n\n![two](/images/missing.png)"
+            images = [
+                event[3] for event in annotate_images(markdown_to_events(md), static_dir)
+                if event[0] is EventType.SPAN
+            ]
+        self.assertEqual(images[0], {
+            "src": "/images/a.png", "alt": "one", "width": 1079, "height": 720, "decoding": "async",
+        })
+        self.assertEqual(images[1], {
+            "src": "/images/missing.png", "alt": "two", "loading": "lazy", "decoding": "async",
+        })
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+import asyncio
+import io
+import json
+import os
+import tempfile
+import time
+import unittest
+from contextlib import redirect_stdout
+from unittest import mock
+
+from fixtures import write
+from loadtest import format_report, main, parse_mix, percentile, run_load, site_paths, start_server
+
+class TestHelpers(unittest.TestCase):
+    def test_percentile_nearest_rank(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 95), 95)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([7], 99), 7)
+        self.assertEqual(percentile([], 50), 0.0)
+
+    def test_parse_mix(self):
+        self.assertEqual(parse_mix(["/a", "/b=3", "/c?x=1=0.5"]), {"/a": 1.0, "/b": 3.0, "/c?x=1": 0.5})
+        for bad in ("/a=x", "/a=0"):
+            with self.assertRaises(ValueError):
+                parse_mix([bad])
+
+class TestLoad(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.site = os.path.join(self.tmp.name, "site")
+        write(os.path.join(self.site, "index.html"), "<p>home</p>")
+        write(os.path.join(self.site, "blog", "post", "index.html"), "<p>post</p>" * 100)
+        write(os.path.join(self.site, "index.css"), "body {}")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_site_paths(self):
+        self.assertEqual(site_paths(self.site, "/x/"), ["/x/", "/x/blog/post/"])
+
+    def test_run_load_against_stand_in_server(self):
+        server, port = start_server(self.site, "/x/")
+        try:
+            mix = {"/x/": 1.0, "/x/blog/post/": 1.0, "/x/missing": 1.0}
+            results = asyncio.run(run_load(f"http://127.0.0.1:{port}", mix, concurrency=4, duration=0.3))
+        finally:
+            server.terminate()
+            server.join()
+
+        post = results["pages"]["/x/blog/post/"]
+        self.assertGreater(post["requests"], 0)
+        self.assertEqual(post["errors"], 0)
+        self.assertEqual(post["bytes"], post["requests"] * len("<p>post</p>") * 100)
+        self.assertLessEqual(post["p50_ms"], post["p95_ms"])
+        self.assertLessEqual(post["p95_ms"], post["p99_ms"])
+        self.assertEqual(results["pages"]["/x/missing"]["requests"], 0)
+        self.assertGreater(results["pages"]["/x/missing"]["errors"], 0)
+        self.assertEqual(
+            results["total"]["requests"],
+            sum(page["requests"] for page in results["pages"].values()),
+        )
+
+    def test_stalled_server_times_out(self):
+        async def stall(reader, writer):
+            await reader.read()
+            writer.close()
+
+        async def run():
+            server = await asyncio.start_server(stall, "127.0.0.1", 0)
+            async with server:
+                port = server.sockets[0].getsockname()[1]
+                return await run_load(f"http://127.0.0.1:{port}", {"/": 1.0}, concurrency=2, duration=0.2)
+
+        started = time.perf_counter()
+        with mock.patch("loadtest._DEADLINE_GRACE", 0.1):
+            results = asyncio.run(run())
+        self.assertLess(time.perf_counter() - started, 2)
+        self.assertEqual(results["total"]["requests"], 0)
+        self.assertEqual(results["total"]["errors"], 2)
+
+    def test_command_writes_json_and_compares(self):
+        output = os.path.join(self.tmp.name, "results", "run.json")
+        argv = ["--dir", self.site, "--duration", "0.2", "--concurrency", "2", "--output", output]
+        with redirect_stdout(io.StringIO()):
+            self.assertEqual(main(argv), 0)
+        with open(output) as f:
+            results = json.load(f)
+        self.assertEqual(sorted(results["pages"]), ["/", "/blog/post/"])
+        report = format_report(results, results)
+        self.assertIn("TOTAL", report)
+        self.assertIn("(+0%)", report)
+
+    def test_bad_compare_path_fails_before_the_run(self):
+        argv = ["--dir", self.site, "--compare", os.path.join(self.tmp.name, "missing.json")]
+        with mock.patch("loadtest.run_load") as run:
+            with self.assertRaises(SystemExit):
+                main(argv)
+        run.assert_not_called()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from fixtures import STYLED_TEMPLATE, read, setUpModule, tearDownModule, write
+from functions import markdown_to_events
+from main import (
+    copy_static_files,
+    generate_pages_for_targets,
+    rebase_urls,
+    render_page,
+    split_root_urls,
+)
+
+class TestRebase(unittest.TestCase):
+    def test_rebase_only_root_relative_attributes(self):
+        html = '<a href="/a">x</a><img src="/i.png"></img><a href="https://x/">y</a> href="/'
+        self.assertEqual(
+            rebase_urls(html, "/site/"),
+            '<a href="/site/a">x</a><img src="/site/i.png"></img><a href="https://x/">y</a> href="/site/',
+        )
+
+    def test_split_then_join_round_trips(self):
+        html = '<a href="/a">x</a>'
+        self.assertEqual("/".join(split_root_urls(html)), html)
+
+    def test_title_is_escaped(self):
+        page = render_page("# Fish & <Chips>", STYLED_TEMPLATE, "/")
+        self.assertTrue(page.startswith("<title>Fish &amp; &lt;Chips&gt;</title>"))
+
+class TestMultipleTargets(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        write(os.path.join(self.root, "content", "blog", "index.md"), "# Post\n\n[Home](/)")
+        write(os.path.join(self.root, "template.html"), STYLED_TEMPLATE)
+        write(os.path.join(self.root, "static", "index.css"), "body {}")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_one_parse_many_basepaths(self):
+        targets = [("/", os.path.join(self.root, "a")), ("/site/", os.path.join(self.root, "b"))]
+        with mock.patch("main.markdown_to_events", wraps=markdown_to_events) as parse:
+            generate_pages_for_targets(os.path.join(self.root, "content"), os.path.join(self.root, "template.html"), targets)
+        self.assertEqual(parse.call_count, 1)
+
+        self.assertEqual(
+            read(os.path.join(self.root, "a", "blog", "index.html")),
+            '<title>Post</title><link href="/index.css" rel="stylesheet" /><div><h1>Post</h1><p><a href="/">Home</a></p></div>',
+        )
+        self.assertEqual(
+            read(os.path.join(self.root, "b", "blog", "index.html")),
+            '<title>Post</title><link href="/site/index.css" rel="stylesheet" /><div><h1>Post</h1><p><a href="/site/">Home</a></p></div>',
+        )
+
+    def test_static_files_are_hardlinked(self):
+        static = os.path.join(self.root, "static")
+        first, second = os.path.join(self.root, "a"), os.path.join(self.root, "b")
+        copy_static_files(static, first)
+        copy_static_files(static, second, link_from=first)
+        self.assertTrue(os.path.samefile(os.path.join(first, "index.css"), os.path.join(second, "index.css")))
+        self.assertFalse(os.path.samefile(os.path.join(static, "index.css"), os.path.join(first, "index.css")))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import os
+import tarfile
+import tempfile
+import unittest
+import zipfile
+
+from fixtures import setUpModule, tearDownModule, write
+from outputs import ArchiveOutput, DirectoryOutput, open_output
+from main import add_static_files, generate_pages_for_targets
+
+class TestArchiveOutput(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        write(os.path.join(self.root, "static", "images", "a.txt"), "a")
+        write(os.path.join(self.root, "static", "index.css"), "body {}")
+        write(os.path.join(self.root, "content", "index.md"), "# Home")
+        write(os.path.join(self.root, "content", "blog", "index.md"), "# Blog")
+        write(os.path.join(self.root, "template.html"), "{{ Content }}")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build(self, name, mtime=0):
+        path = os.path.join(self.root, name)
+        output = open_output(path, archive=True)
+        output.mtime = mtime
+        add_static_files(os.path.join(self.root, "static"), output)
+        generate_pages_for_targets(
+            os.path.join(self.root, "content"),
+            os.path.join(self.root, "template.html"),
+            [("/", output)],
+        )
+        output.close()
+        with open(path, "rb") as f:
+            return f.read()
+
+    def test_archives_are_reproducible(self):
+        for suffix in (".tar", ".tar.gz", ".tar.xz", ".zip"):
+            with self.subTest(suffix=suffix):
+                self.assertEqual(self.build("one" + suffix), self.build("two" + suffix))
+
+    def test_tar_contents(self):
+        self.build("site.tar.gz", mtime=1700000000)
+        with tarfile.open(os.path.join(self.root, "site.tar.gz")) as archive:
+            members = archive.getmembers()
+            self.assertEqual(
+                [member.name for member in members],
+                ["index.css", "images/a.txt", "blog/index.html", "index.html"],
+            )
+            self.assertTrue(all(member.mtime == 1700000000 for member in members))
+            self.assertEqual(archive.extractfile("index.html").read(), b"<div><h1>Home</h1></div>")
+
+    def test_zip_contents(self):
+        self.build("site.zip")
+        with zipfile.ZipFile(os.path.join(self.root, "site.zip")) as archive:
+            self.assertEqual(archive.read("blog/index.html"), b"<div><h1>Blog</h1></div>")
+            self.assertEqual(archive.getinfo("index.css").compress_type, zipfile.ZIP_DEFLATED)
+
+    def test_no_partial_archive_until_close(self):
+        path = os.path.join(self.root, "site.tar")
+        output = ArchiveOutput(path, "tar", "none")
+        output.write_bytes("index.html", b"x")
+        self.assertFalse(os.path.exists(path))
+        output.close()
+        self.assertTrue(os.path.exists(path))
+
+    def test_duplicate_entries_rejected(self):
+        output = ArchiveOutput(os.path.join(self.root, "site.zip"), "zip", "none")
+        output.write_bytes("index.html", b"x")
+        with self.assertRaises(ValueError):
+            output.write_bytes("index.html", b"y")
+        output.close()
+
+    def test_bad_compression_opens_nothing(self):
+        path = os.path.join(self.root, "site.tar")
+        with self.assertRaises(ValueError):
+            ArchiveOutput(path, "tar", "deflate")
+        with self.assertRaises(ValueError):
+            open_output(path, archive=True, compression="deflate")
+        self.assertEqual(sorted(os.listdir(self.root)), ["content", "static", "template.html"])
+
+    def test_abort_removes_temp_file(self):
+        output = ArchiveOutput(os.path.join(self.root, "site.tar.gz"), "tar", "gz")
+        output.write_bytes("index.html", b"x")
+        output.abort()
+        self.assertEqual(sorted(os.listdir(self.root)), ["content", "static", "template.html"])
+
+    def test_unknown_suffix(self):
+        with self.assertRaises(ValueError):
+            open_output(os.path.join(self.root, "site.rar"), archive=True)
+        self.assertIsInstance(open_output(os.path.join(self.root, "site")), DirectoryOutput)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+import struct
+import tempfile
+import unittest
+import zlib
+from unittest import mock
+
+import pngopt
+from buildcache import BuildCache, LocalDirBackend
+from fixtures import setUpModule, tearDownModule
+from main import copy_static_files
+from pngopt import PngCache, optimize_png, optimize_tree, read_chunks, unfilter_rows, write_chunk
+from vfs import MemoryFS
+
+def make_png(width, height, color=6, depth=8, rows=None, extra=(), interlace=0):
+    channels = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}[color]
+    stride = (width * channels * depth + 7) // 8
+    if rows is None:
+        rows = [bytes((x * 7 + y * 13) & 255 for x in range(stride)) for y in range(height)]
+    # Stored unfiltered with the fastest deflate, like many exporters.
+    raw = b"".join(b"\0" + row for row in rows)
+    ihdr = struct.pack(">IIBBBBB", width, height, depth, color, 0, 0, interlace)
+    chunks = [write_chunk(b"IHDR", ihdr)]
+    chunks += [write_chunk(kind, body) for kind, body in extra]
+    chunks.append(write_chunk(b"IDAT", zlib.compress(raw, 0)))
+    chunks.append(write_chunk(b"IEND", b""))
+    return pngopt.PNG_SIGNATURE + b"".join(chunks)
+
+def pixels(data):
+    chunks = read_chunks(data)
+    width, height, depth, color = struct.unpack(">IIBB", chunks[0][1][:10])
+    bits = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}[color] * depth
+    raw = zlib.decompress(b"".join(body for kind, body in chunks if kind == b"IDAT"))
+    return unfilter_rows(raw, height, (width * bits + 7) // 8, max(1, bits // 8))
+
+class TestOptimizePng(unittest.TestCase):
+    def test_lossless_and_smaller(self):
+        for color, depth in ((6, 8), (2, 8), (0, 8), (2, 16), (0, 1)):
+            original = make_png(40, 30, color, depth)
+            optimized = optimize_png(original)
+            self.assertLess(len(optimized), len(original))
+            self.assertEqual(pixels(optimized), pixels(original))
+
+    def test_strips_metadata_but_keeps_rendering_chunks(self):
+        original = make_png(20, 20, extra=[(b"tEXt", b"Comment\0hello"), (b"sRGB", b"\0"), (b"tIME", bytes(7))])
+        kinds = [kind for kind, _ in read_chunks(optimize_png(original))]
+        self.assertEqual(kinds, [b"IHDR", b"sRGB", b"IDAT", b"IEND"])
+
+    def test_palette_keeps_plte_and_trns(self):
+        rows = [bytes((x + y) % 4 for x in range(32)) for y in range(32)]
+        palette = bytes(range(12))
+        original = make_png(32, 32, 3, 8, rows, extra=[(b"PLTE", palette), (b"tRNS", b"\xff\x80")])
+        chunks = read_chunks(optimize_png(original))
+        self.assertIn((b"PLTE", palette), chunks)
+        self.assertIn((b"tRNS", b"\xff\x80"), chunks)
+
+    def test_unsupported_images_are_returned_unchanged(self):
+        interlaced = make_png(8, 8, interlace=1)
+        self.assertEqual(optimize_png(interlaced), interlaced)
+        animated = make_png(8, 8, extra=[(b"acTL", bytes(8))])
+        self.assertEqual(optimize_png(animated), animated)
+
+    def test_corrupt_png_raises(self):
+        data = bytearray(make_png(8, 8))
+        data[20] ^= 1
+        with self.assertRaises(ValueError):
+            optimize_png(bytes(data))
+
+class TestOptimizeTree(unittest.TestCase):
+    def setUp(self):
+        self.previous = pngopt.get_cache()
+
+    def tearDown(self):
+        pngopt._cache = self.previous
+
+    def test_results_are_cached_by_content(self):
+        fs = MemoryFS({"static/a.png": make_png(30, 30), "static/b.png": make_png(30, 30), "static/x.css": "a{}"})
+        with tempfile.TemporaryDirectory() as tmp:
+            pngopt.configure_cache(tmp)
+            first = optimize_tree("static", fs, workers=1)
+            self.assertEqual(sorted(first), ["a.png", "b.png"])
+
+            # A fresh process only has the disk cache to go on.
+            pngopt._cache = PngCache(tmp)
+            with mock.patch.object(pngopt, "ProcessPoolExecutor") as pool:
+                self.assertEqual(optimize_tree("static", fs), first)
+            pool.assert_not_called()
+
+    def test_results_are_shared_through_the_build_cache(self):
+        fs = MemoryFS({"static/a.png": make_png(30, 30)})
+        with tempfile.TemporaryDirectory() as tmp:
+            pngopt._cache = PngCache()
+            first = optimize_tree("static", fs, workers=1, build_cache=BuildCache(LocalDirBackend(tmp)))
+
+            # Another runner with no local cache reuses the shared result.
+            pngopt._cache = PngCache()
+            build_cache = BuildCache(LocalDirBackend(tmp))
+            with mock.patch.object(pngopt, "ProcessPoolExecutor") as pool:
+                self.assertEqual(optimize_tree("static", fs, build_cache=build_cache), first)
+            pool.assert_not_called()
+        self.assertEqual((build_cache.hits, build_cache.misses), (1, 0))
+
+    def test_copy_writes_optimized_bytes(self):
+        fs = MemoryFS({"static/images/a.png": make_png(30, 30), "static/index.css": "a{}"})
+        pngopt.configure_cache(None)
+        overrides = optimize_tree("static", fs, workers=1)
+        copy_static_files("static", "out", overrides=overrides, fs=fs)
+        self.assertEqual(fs.read_bytes("out/images/a.png"), overrides["images/a.png"])
+        self.assertEqual(fs.read_text("out/index.css"), "a{}")
+
+if __name__ == "__main__":
+    unittest.main()
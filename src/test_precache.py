@@ -0,0 +1,84 @@
+import json
+import os
+import tarfile
+import tempfile
+import unittest
+from unittest import mock
+
+from fixtures import memory_site, setUpModule, tearDownModule
+from main import generate_pages_for_targets, main
+from outputs import DirectoryOutput
+from precache import PrecacheManifest, RecordingOutput, record_tree, revision
+from vfs import DISK
+
+def build(fs, basepath="/site/", max_bytes=1000):
+    manifest = PrecacheManifest(max_bytes)
+    record_tree(manifest, "static", fs)
+    output = RecordingOutput(DirectoryOutput("out", fs), manifest)
+    generate_pages_for_targets("content", "template.html", [(basepath, output)], service_worker=True, fs=fs)
+    manifest.write(output.output, basepath)
+    return json.loads(fs.read_text("out/precache-manifest.json"))
+
+class TestPrecacheManifest(unittest.TestCase):
+    def setUp(self):
+        self.fs = memory_site({
+            "content/index.md": "# Home",
+            "content/blog/index.md": "# Blog\n\nHello",
+            "static/index.css": "body {}",
+            "static/images/big.png": b"\0" * 5000,
+        })
+
+    def test_lists_pages_and_static_files_under_basepath(self):
+        entries = build(self.fs)
+        self.assertEqual(
+            [entry["url"] for entry in entries],
+            ["/site/blog/index.html", "/site/index.css", "/site/index.html"],
+        )
+        self.assertEqual(entries[1]["revision"], revision(b"body {}"))
+
+    def test_size_cap_excludes_large_files(self):
+        urls = [entry["url"] for entry in build(self.fs, max_bytes=0)]
+        self.assertIn("/site/images/big.png", urls)
+
+    def test_oversized_files_are_never_read(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            with open(os.path.join(tmp, "index.css"), "w") as f:
+                f.write("body {}")
+            with open(os.path.join(tmp, "big.png"), "wb") as f:
+                f.write(b"\0" * 5000)
+            with mock.patch.object(DISK, "read_bytes", wraps=DISK.read_bytes) as read_bytes:
+                record_tree(PrecacheManifest(1000), tmp, DISK)
+        self.assertEqual([call.args[0] for call in read_bytes.call_args_list], [os.path.join(tmp, "index.css")])
+
+    def test_only_changed_pages_get_new_revisions(self):
+        before = {entry["url"]: entry["revision"] for entry in build(self.fs)}
+        self.fs.write_text("content/blog/index.md", "# Blog\n\nChanged")
+        after = {entry["url"]: entry["revision"] for entry in build(self.fs)}
+        changed = sorted(url for url in before if before[url] != after[url])
+        self.assertEqual(changed, ["/site/blog/index.html"])
+
+    def test_service_worker_is_bound_to_manifest(self):
+        build(self.fs)
+        worker = self.fs.read_text("out/sw.js")
+        self.assertTrue(worker.startswith('const BASEPATH = "/site/";'))
+        self.assertIn(json.dumps(revision(self.fs.read_bytes("out/precache-manifest.json"))), worker)
+        self.assertIn('navigator.serviceWorker.register("/site/sw.js")', self.fs.read_text("out/index.html"))
+
+class TestServiceWorkerCommand(unittest.TestCase):
+    def test_directory_and_archive_builds_agree(self):
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as tmp:
+            os.chdir(root)
+            try:
+                main(["/x/", "--service-worker", "--cache-dir", "", "--log-level", "error", "--output", os.path.join(tmp, "site")])
+                main(["/x/", "--service-worker", "--cache-dir", "", "--log-level", "error", "--archive", "--output", os.path.join(tmp, "site.tar")])
+            finally:
+                os.chdir(cwd)
+            with tarfile.open(os.path.join(tmp, "site.tar")) as archive:
+                archived = archive.extractfile("precache-manifest.json").read()
+            with open(os.path.join(tmp, "site", "precache-manifest.json"), "rb") as f:
+                self.assertEqual(f.read(), archived)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+
+from fixtures import TEMPLATE, memory_site, setUpModule, tearDownModule
+from main import generate_pages_for_targets
+from prefetch import LinkGraph, inject_head, page_url, page_url_aliases, prefetch_tags
+
+class TestPageUrls(unittest.TestCase):
+    def test_page_url(self):
+        self.assertEqual(page_url("index.html"), "/")
+        self.assertEqual(page_url("blog/tom/index.html"), "/blog/tom/")
+        self.assertEqual(page_url("about.html"), "/about.html")
+
+    def test_aliases(self):
+        self.assertEqual(
+            sorted(page_url_aliases("blog/tom/index.html")),
+            ["/blog/tom", "/blog/tom/", "/blog/tom/index.html"],
+        )
+        self.assertEqual(sorted(page_url_aliases("index.html")), ["/", "/index.html"])
+
+class TestLinkGraph(unittest.TestCase):
+    def setUp(self):
+        self.graph = LinkGraph(["index.html", "a/index.html", "b/index.html", "c/index.html"])
+
+    def test_ignores_external_and_self_links(self):
+        self.graph.add_page("a/index.html", ["https://example.com/", "//cdn/x", "/a/", "/missing", "/b#top"])
+        self.assertEqual(self.graph.ranked_targets("a/index.html"), ["b/index.html"])
+        self.assertEqual(self.graph.link_url("a/index.html", "b/index.html"), "/b")
+
+    def test_ranks_by_count_then_inbound_then_order(self):
+        self.graph.add_page("a/index.html", ["/c/"])
+        self.graph.add_page("b/index.html", ["/c/"])
+        self.graph.add_page("index.html", ["/a/", "/b/", "/c/", "/b/"])
+        self.assertEqual(self.graph.ranked_targets("index.html"), ["b/index.html", "c/index.html", "a/index.html"])
+
+    def test_top_k_and_budget(self):
+        self.graph.add_page("index.html", ["/a/", "/b/", "/c/"])
+        sizes = {"a/index.html": 60, "b/index.html": 50, "c/index.html": 30}
+        self.assertEqual(self.graph.prefetch_targets("index.html", 2, 0, sizes), ["a/index.html", "b/index.html"])
+        self.assertEqual(self.graph.prefetch_targets("index.html", 3, 100, sizes), ["a/index.html", "c/index.html"])
+
+    def test_tags(self):
+        self.assertEqual(prefetch_tags(["/a"], "/site/"), '<link rel="prefetch" href="/site/a" />')
+        self.assertEqual(inject_head(TEMPLATE, ""), TEMPLATE)
+        self.assertIn("<x />\n  </head>", inject_head(TEMPLATE, "<x />"))
+
+class TestPrefetchBuild(unittest.TestCase):
+    def setUp(self):
+        self.fs = memory_site({
+            "content/index.md": "# Home\n\n[A](/a) [B](/b/) [B again](/b/)",
+            "content/a/index.md": "# A\n\n[Home](/)",
+            "content/b/index.md": "# B\n\n" + "long " * 200,
+        })
+
+    def test_hints_are_injected(self):
+        generate_pages_for_targets("content", "template.html", [("/site/", "out")], prefetch=1, fs=self.fs)
+        self.assertIn('<link rel="prefetch" href="/site/b/" />', self.fs.read_text("out/index.html"))
+        self.assertNotIn("/site/a", self.fs.read_text("out/index.html").split("</head>")[0])
+        self.assertIn('<link rel="prefetch" href="/site/" />', self.fs.read_text("out/a/index.html"))
+        self.assertNotIn("prefetch", self.fs.read_text("out/b/index.html"))
+
+    def test_budget_skips_large_pages(self):
+        generate_pages_for_targets("content", "template.html", [("/", "out")], prefetch=2, prefetch_budget=500, fs=self.fs)
+        head = self.fs.read_text("out/index.html").split("</head>")[0]
+        self.assertIn('href="/a"', head)
+        self.assertNotIn('href="/b/"', head)
+
+    def test_fragment_hints(self):
+        generate_pages_for_targets("content", "template.html", [("/", "out")], fragments=True, prefetch=1, fs=self.fs)
+        self.assertIn('<link rel="prefetch" href="/b/index.frag.json" />', self.fs.read_text("out/index.html"))
+
+if __name__ == "__main__":
+    unittest.main()
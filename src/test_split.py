@@ -0,0 +1,124 @@
+import json, os, tempfile, unittest
+from unittest import mock
+
+from buildcache import BuildCache, LocalDirBackend
+from fixtures import memory_site, setUpModule, tearDownModule
+from functions import markdown_to_events
+from images import annotate_images
+from main import generate_pages_for_targets
+from split import part_path, part_url, slugify, split_page
+
+LONG = "\n\n".join([
+    "# Guide",
+    "Intro paragraph, see [setup](#setup-again) and [top](#guide).",
+    "## Install",
+    "Install " + "words " * 40,
+    "## Setup again",
+    "Setup " + "words " * 40,
+    "### Details",
+    "More " + "words " * 40,
+    "## Setup again",
+    "Last " + "words " * 40,
+])
+
+def split(markdown, threshold, relpath="blog/guide/index.html"):
+    return split_page(list(markdown_to_events(markdown)), "Guide", relpath, threshold)
+
+class TestPartPaths(unittest.TestCase):
+    def test_part_path(self):
+        self.assertEqual(part_path("blog/guide/index.html", 1), "blog/guide/index.html")
+        self.assertEqual(part_path("blog/guide/index.html", 2), os.path.join("blog", "guide", "2", "index.html"))
+        self.assertEqual(part_path("about.html", 3), os.path.join("about", "3", "index.html"))
+        self.assertEqual(part_path("index.html", 2), os.path.join("2", "index.html"))
+
+    def test_part_url(self):
+        self.assertEqual(part_url("blog/guide/index.html"), "/blog/guide/")
+        self.assertEqual(part_url("about.html"), "/about.html")
+
+    def test_slugify(self):
+        self.assertEqual(slugify("Setup, again!"), "setup-again")
+        self.assertEqual(slugify("!!"), "section")
+
+class TestSplitPage(unittest.TestCase):
+    def test_small_page_is_unchanged(self):
+        pages = split("# Guide\n\n## Install\n\nShort", 10000)
+        self.assertEqual(pages, [("blog/guide/index.html", "Guide", "<div><h1>Guide</h1><h2>Install</h2><p>Short</p></div>")])
+
+    def test_page_without_h2_is_not_split(self):
+        pages = split("# Guide\n\n" + "words " * 200, 100)
+        self.assertEqual(len(pages), 1)
+        self.assertNotIn("page-nav", pages[0][2])
+
+    def test_splits_at_h2(self):
+        pages = split(LONG, 400)
+        self.assertEqual([relpath for relpath, _, _ in pages], [
+            "blog/guide/index.html",
+            os.path.join("blog", "guide", "2", "index.html"),
+            os.path.join("blog", "guide", "3", "index.html"),
+        ])
+        self.assertEqual([title for _, title, _ in pages], ["Guide", "Guide: Setup again", "Guide: Setup again"])
+        first, second, third = (html for _, _, html in pages)
+        self.assertIn('<h2 id="install">Install</h2>', first)
+        # An H3 stays with the H2 section it belongs to.
+        self.assertIn('<h3 id="details">Details</h3>', second)
+        self.assertIn('<h2 id="setup-again-2">Setup again</h2>', third)
+
+    def test_index_and_pager(self):
+        _, _, second = split(LONG, 400)[1]
+        self.assertIn(
+            '<nav class="page-index"><ol><li><a href="/blog/guide/">Guide</a></li>'
+            '<li aria-current="page">Setup again</li>'
+            '<li><a href="/blog/guide/3/">Setup again</a></li></ol></nav>',
+            second,
+        )
+        self.assertIn(
+            '<nav class="page-nav"><a rel="prev" href="/blog/guide/">&larr; Guide</a>'
+            '<a rel="next" href="/blog/guide/3/">Setup again &rarr;</a></nav>',
+            second,
+        )
+
+    def test_anchors_follow_their_heading(self):
+        _, _, first = split(LONG, 400)[0]
+        self.assertIn('<a href="/blog/guide/2/#setup-again">setup</a>', first)
+        self.assertIn('<a href="#guide">top</a>', first)
+
+    def test_first_image_of_each_part_is_eager(self):
+        markdown = LONG.replace("Intro", "![top](/top.png) Intro").replace("Setup words", "![a](/a.png) ![b](/b.png) Setup words")
+        pages = split_page(list(annotate_images(markdown_to_events(markdown))), "Guide", "guide.html", 400)
+        first, later = pages[0][2], next(html for _, _, html in pages[1:] if "/a.png" in html)
+        self.assertIn('<img src="/top.png" alt="top" decoding="async">', first)
+        self.assertIn('<img src="/a.png" alt="a" decoding="async">', later)
+        self.assertIn('<img src="/b.png" alt="b" loading="lazy" decoding="async">', later)
+
+class TestSplitBuild(unittest.TestCase):
+    def setUp(self):
+        self.fs = memory_site({"content/guide/index.md": LONG})
+
+    def build(self, **kwargs):
+        generate_pages_for_targets("content", "template.html", [("/docs/", "out")], split_threshold=400, fs=self.fs, **kwargs)
+
+    def test_writes_every_part_from_one_parse(self):
+        with mock.patch("main.markdown_to_events", wraps=markdown_to_events) as parse:
+            self.build(fragments=True)
+        self.assertEqual(parse.call_count, 1)
+        first = self.fs.read_text("out/guide/index.html")
+        self.assertIn("<title>Guide</title>", first)
+        self.assertIn('href="/docs/guide/2/#setup-again"', first)
+        self.assertIn("<title>Guide: Setup again</title>", self.fs.read_text("out/guide/3/index.html"))
+        fragment = json.loads(self.fs.read_text("out/guide/2/index.frag.json"))
+        self.assertEqual(fragment["title"], "Guide: Setup again")
+
+    def test_build_cache_restores_every_part(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            self.build(build_cache=BuildCache(LocalDirBackend(tmp)))
+            expected = {path: self.fs.read_bytes(path) for path in ("out/guide/index.html", "out/guide/2/index.html", "out/guide/3/index.html")}
+            self.fs.rmtree("out")
+            cache = BuildCache(LocalDirBackend(tmp))
+            with mock.patch("main.markdown_to_events") as parse:
+                self.build(build_cache=cache)
+            parse.assert_not_called()
+            self.assertEqual((cache.hits, cache.misses), (1, 0))
+            self.assertEqual({path: self.fs.read_bytes(path) for path in expected}, expected)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import os
+import tempfile
+import unittest
+
+from staging import (
+    stage_generation,
+    publish_generation,
+    discard_generation,
+    current_generation,
+    list_generations,
+    remove_unwritten,
+    rollback,
+)
+from fixtures import read, write
+from main import copy_static_files
+
+class TestStaging(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.output = os.path.join(self.tmp.name, "docs")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build(self, text, seed=False, keep=3):
+        staging = stage_generation(self.output, seed=seed)
+        path = os.path.join(staging, "index.html")
+        if os.path.lexists(path):
+            os.remove(path)
+        write(path, text)
+        return publish_generation(self.output, staging, keep=keep)
+
+    def test_publish_flips_symlink(self):
+        staging = self.build("one")
+        self.assertTrue(os.path.islink(self.output))
+        self.assertEqual(current_generation(self.output), os.path.realpath(staging))
+        self.assertEqual(read(os.path.join(self.output, "index.html")), "one")
+
+    def test_existing_directory_becomes_a_generation(self):
+        write(os.path.join(self.output, "index.html"), "legacy")
+        self.build("new")
+        self.assertEqual(read(os.path.join(self.output, "index.html")), "new")
+        rollback(self.output)
+        self.assertEqual(read(os.path.join(self.output, "index.html")), "legacy")
+
+    def test_seed_does_not_modify_live_generation(self):
+        first = self.build("one")
+        write(os.path.join(first, "keep.txt"), "kept")
+        staging = stage_generation(self.output, seed=True)
+        self.assertEqual(read(os.path.join(staging, "keep.txt")), "kept")
+
+        os.remove(os.path.join(staging, "index.html"))
+        write(os.path.join(staging, "index.html"), "two")
+        self.assertEqual(read(os.path.join(self.output, "index.html")), "one")
+
+    def test_seeded_files_not_rewritten_are_removed(self):
+        first = self.build("one")
+        write(os.path.join(first, "old", "index.html"), "gone")
+        staging = stage_generation(self.output, seed=True)
+        os.remove(os.path.join(staging, "index.html"))
+        write(os.path.join(staging, "index.html"), "two")
+        self.assertEqual(remove_unwritten(self.output, staging), [os.path.join("old", "index.html")])
+        self.assertEqual(os.listdir(staging), ["index.html"])
+        self.assertEqual(read(os.path.join(self.output, "old", "index.html")), "gone")
+
+    def test_prune_keeps_previous_generations(self):
+        for i in range(5):
+            self.build(str(i), keep=2)
+        self.assertEqual(len(list_generations(self.output)), 3)
+        rollback(self.output, 2)
+        self.assertEqual(read(os.path.join(self.output, "index.html")), "2")
+
+    def test_failed_build_is_never_a_generation(self):
+        self.build("one")
+        staging = stage_generation(self.output)
+        write(os.path.join(staging, "index.html"), "partial")
+        self.assertEqual(len(list_generations(self.output)), 1)
+        discard_generation(staging)
+        self.build("two")
+        rollback(self.output)
+        self.assertEqual(read(os.path.join(self.output, "index.html")), "one")
+        self.assertFalse(os.path.exists(staging))
+
+    def test_plain_build_replaces_the_link(self):
+        self.build("one")
+        static = os.path.join(self.tmp.name, "static")
+        write(os.path.join(static, "index.css"), "body {}")
+        copy_static_files(static, self.output)
+        self.assertFalse(os.path.islink(self.output))
+        self.assertEqual(os.listdir(self.output), ["index.css"])
+        self.assertEqual(len(list_generations(self.output)), 1)
+
+    def test_rollback_past_oldest_raises(self):
+        self.build("one")
+        with self.assertRaises(ValueError):
+            rollback(self.output)
+
+if __name__ == "__main__":
+    unittest.main()
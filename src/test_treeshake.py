@@ -0,0 +1,80 @@
+import os
+import tempfile
+import unittest
+import zipfile
+
+from fixtures import memory_site, setUpModule, tearDownModule
+from main import copy_static_files, generate_pages_for_targets, main
+from outputs import DirectoryOutput
+from treeshake import ReferenceCollector, css_references, resolve_reference, used_static_files
+
+class TestReferences(unittest.TestCase):
+    def test_resolve_reference(self):
+        self.assertEqual(resolve_reference("/site/a/b.png?x#y", "index.html", "/site/"), "a/b.png")
+        self.assertEqual(resolve_reference("img.png", "blog/post/index.html", "/"), "blog/post/img.png")
+        self.assertEqual(resolve_reference("../a.css", "css/x.css"), "a.css")
+        for ref in ("/other/a.png", "https://x/a.png", "//cdn/a.png", "data:image/png;base64,xx", "mailto:a@b", "#top", "../../x"):
+            self.assertIsNone(resolve_reference(ref, "a/index.html", "/site/"))
+
+    def test_css_references(self):
+        css = "a{background:url( 'b.png' )} @import \"c.css\"; d{src:url(/fonts/e.woff)}"
+        self.assertEqual(list(css_references(css, "css/site.css")), ["css/b.png", "css/c.css", "fonts/e.woff"])
+
+class TestTreeShaking(unittest.TestCase):
+    def build(self, basepath="/"):
+        fs = memory_site({
+            "static/index.css": "@import 'css/theme.css'; body { background: url(/images/bg.png); }",
+            "static/css/theme.css": "h1 { background: url(\"../fonts/x.woff2?v=1\"); }",
+            "static/images/used.png": b"used",
+            "static/images/bg.png": b"bg",
+            "static/images/orphan.png": b"orphan!",
+            "static/fonts/x.woff2": b"font",
+            "static/robots.txt": "",
+            "content/index.md": "# Home\n\n![a](/images/used.png) [ext](https://example.com/images/orphan.png)",
+        }, '<link href="/index.css" rel="stylesheet" />{{ Content }}')
+        references = set()
+        output = ReferenceCollector(DirectoryOutput("out", fs), basepath, references)
+        generate_pages_for_targets("content", "template.html", [(basepath, output)], fs=fs)
+        return fs, used_static_files("static", references, fs)
+
+    def test_used_assets_follow_pages_template_and_css(self):
+        for basepath in ("/", "/site/"):
+            _, used = self.build(basepath)
+            self.assertEqual(
+                used,
+                {"index.css", "css/theme.css", "images/bg.png", "images/used.png", "fonts/x.woff2", "robots.txt"},
+            )
+
+    def test_copy_skips_orphans(self):
+        fs, used = self.build()
+        copy_static_files("static", "out", clean=False, include=used, fs=fs)
+        self.assertTrue(fs.isfile("out/images/used.png"))
+        self.assertFalse(fs.exists("out/images/orphan.png"))
+        self.assertTrue(fs.isfile("out/index.html"))
+
+    def test_empty_directories_are_not_created(self):
+        fs, _ = self.build()
+        copy_static_files("static", "out2", include={"index.css"}, fs=fs)
+        self.assertEqual(fs.listdir("out2"), ["index.css"])
+
+class TestPruneCommand(unittest.TestCase):
+    def test_directory_and_archive_builds_ship_the_same_files(self):
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as tmp:
+            os.chdir(root)
+            try:
+                main(["--prune-static", "--keep-static", "images/rivendell*", "--cache-dir", "", "--log-level", "error", "--output", os.path.join(tmp, "site")])
+                main(["--prune-static", "--cache-dir", "", "--log-level", "error", "--archive", "--output", os.path.join(tmp, "site.zip")])
+            finally:
+                os.chdir(cwd)
+            shipped = sorted(
+                os.path.relpath(os.path.join(dirpath, name), os.path.join(tmp, "site"))
+                for dirpath, _, names in os.walk(os.path.join(tmp, "site")) for name in names
+            )
+            archived = sorted(zipfile.ZipFile(os.path.join(tmp, "site.zip")).namelist())
+            self.assertIn("images/rivendell-1079x720.png", shipped)
+            self.assertEqual([name for name in shipped if "rivendell" not in name], archived)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+import os
+import tempfile
+import unittest
+
+from fixtures import STYLED_TEMPLATE, memory_site, setUpModule, tearDownModule
+from main import add_static_files, copy_static_files, generate_pages_for_targets
+from outputs import DirectoryOutput
+from vfs import DiskFS, MemoryFS, OverlayFS
+
+SITE = {
+    "content/index.md": "# Home\n\n[post](/blog/)",
+    "content/blog/index.md": "# Blog\n\nHello",
+    "static/index.css": "body { color: red; }",
+    "static/images/a.png": b"\x89PNG",
+}
+
+class TestMemoryFS(unittest.TestCase):
+    def test_read_write_round_trip(self):
+        fs = MemoryFS()
+        fs.makedirs("a/b")
+        fs.write_text("a/b/c.txt", "hi")
+        self.assertEqual(fs.read_text("/a/b/c.txt"), "hi")
+        self.assertTrue(fs.isdir("a"))
+        self.assertEqual(fs.listdir("a"), ["b"])
+
+    def test_write_requires_parent(self):
+        with self.assertRaises(FileNotFoundError):
+            MemoryFS().write_bytes("missing/x", b"")
+
+    def test_walk_is_sorted(self):
+        fs = memory_site(SITE, STYLED_TEMPLATE)
+        walked = [(root, dirs, files) for root, dirs, files in fs.walk("content")]
+        self.assertEqual(walked, [("content", ["blog"], ["index.md"]), ("content/blog", [], ["index.md"])])
+
+    def test_stat_key_changes_on_write(self):
+        fs = memory_site(SITE, STYLED_TEMPLATE)
+        before = fs.stat_key("template.html")
+        fs.write_text("template.html", STYLED_TEMPLATE)
+        self.assertNotEqual(fs.stat_key("template.html"), before)
+
+    def test_rmtree(self):
+        fs = memory_site(SITE, STYLED_TEMPLATE)
+        fs.rmtree("static")
+        self.assertFalse(fs.exists("static/index.css"))
+        self.assertFalse(fs.exists("static/images"))
+        self.assertTrue(fs.exists("content/index.md"))
+        self.assertEqual(fs.listdir(""), ["content", "template.html"])
+
+    def test_listdir_tracks_removals(self):
+        fs = memory_site(SITE, STYLED_TEMPLATE)
+        fs.remove("static/index.css")
+        self.assertEqual(fs.listdir("static"), ["images"])
+        fs.makedirs("static/fonts/woff")
+        self.assertEqual(fs.listdir("static"), ["fonts", "images"])
+        with self.assertRaises(FileExistsError):
+            fs.makedirs("template.html/x")
+
+class TestOverlayFS(unittest.TestCase):
+    def test_writes_do_not_touch_lower(self):
+        lower = memory_site(SITE, STYLED_TEMPLATE)
+        fs = OverlayFS(MemoryFS(), lower)
+        fs.write_text("content/index.md", "# Changed")
+        self.assertEqual(fs.read_text("content/index.md"), "# Changed")
+        self.assertEqual(lower.read_text("content/index.md"), "# Home\n\n[post](/blog/)")
+
+    def test_remove_hides_lower_file(self):
+        fs = OverlayFS(MemoryFS(), memory_site(SITE, STYLED_TEMPLATE))
+        fs.remove("static/index.css")
+        self.assertFalse(fs.exists("static/index.css"))
+        self.assertEqual(fs.listdir("static"), ["images"])
+
+    def test_recreated_directory_is_opaque(self):
+        fs = OverlayFS(MemoryFS(), memory_site(SITE, STYLED_TEMPLATE))
+        fs.rmtree("static")
+        fs.makedirs("static")
+        self.assertEqual(fs.listdir("static"), [])
+        self.assertFalse(fs.isfile("static/index.css"))
+
+    def test_overlay_over_disk(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            with open(os.path.join(tmp, "a.txt"), "w") as f:
+                f.write("disk")
+            fs = OverlayFS(MemoryFS(), DiskFS())
+            fs.write_text(os.path.join(tmp, "b.txt"), "memory")
+            self.assertEqual(fs.read_text(os.path.join(tmp, "a.txt")), "disk")
+            self.assertEqual(sorted(fs.listdir(tmp)), ["a.txt", "b.txt"])
+            self.assertFalse(os.path.exists(os.path.join(tmp, "b.txt")))
+
+class TestMemoryBuild(unittest.TestCase):
+    def test_build_in_memory(self):
+        fs = memory_site(SITE, STYLED_TEMPLATE)
+        copy_static_files("static", "docs", fs=fs)
+        generate_pages_for_targets("content", "template.html", [("/site/", "docs")], "static", fs=fs)
+        self.assertEqual(fs.read_text("docs/index.css"), "body { color: red; }")
+        self.assertEqual(fs.read_bytes("docs/images/a.png"), b"\x89PNG")
+        page = fs.read_text("docs/blog/index.html")
+        self.assertTrue(page.startswith('<title>Blog</title><link href="/site/index.css"'))
+        self.assertIn('href="/site/blog/"', fs.read_text("docs/index.html"))
+
+    def test_memory_build_matches_disk_build(self):
+        fs = memory_site(SITE, STYLED_TEMPLATE)
+        generate_pages_for_targets("content", "template.html", [("/", "out")], fs=fs)
+        with tempfile.TemporaryDirectory() as tmp:
+            for root, _, files in fs.walk("content"):
+                os.makedirs(os.path.join(tmp, root), exist_ok=True)
+                for name in files:
+                    with open(os.path.join(tmp, root, name), "w") as f:
+                        f.write(fs.read_text(os.path.join(root, name)))
+            template_path = os.path.join(tmp, "template.html")
+            with open(template_path, "w") as f:
+                f.write(STYLED_TEMPLATE)
+            out = os.path.join(tmp, "out")
+            generate_pages_for_targets(os.path.join(tmp, "content"), template_path, [("/", out)])
+            for relpath in ("index.html", "blog/index.html"):
+                with open(os.path.join(out, relpath)) as f:
+                    self.assertEqual(fs.read_text(os.path.join("out", relpath)), f.read())
+
+    def test_static_files_from_memory_to_disk(self):
+        fs = memory_site(SITE, STYLED_TEMPLATE)
+        with tempfile.TemporaryDirectory() as tmp:
+            add_static_files("static", DirectoryOutput(tmp), fs=fs)
+            with open(os.path.join(tmp, "index.css")) as f:
+                self.assertEqual(f.read(), "body { color: red; }")
+
+if __name__ == "__main__":
+    unittest.main()
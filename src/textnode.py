@@ -16,6 +16,12 @@ class BlockType(Enum):
     UNORDERED_LIST = "unordered_list"
     ORDERED_LIST = "ordered_list"
 
+class EventType(Enum):
+    OPEN = "open"
+    TEXT = "text"
+    SPAN = "span"
+    CLOSE = "close"
+
 class TextNode:
     def __init__(self, text, text_type, url=None):
         self.text = text
@@ -0,0 +1,90 @@
+import fnmatch, os, posixpath, re
+import buildlog
+
+_REFERENCE = re.compile(r'\b(?:href|src)\s*=\s*"([^"]*)"')
+_CSS_REFERENCE = re.compile(r"""url\(\s*(['"]?)([^'")]+?)\1\s*\)|@import\s+(['"])([^'"]+)\3""")
+
+# Fetched by browsers and hosts by convention rather than by reference.
+ALWAYS_KEEP = ("favicon.ico", "robots.txt", "CNAME", ".nojekyll", "humans.txt")
+
+def resolve_reference(ref: str, base_relpath: str, basepath: str = "/"):
+    ref = ref.strip().split("#", 1)[0].split("?", 1)[0]
+    if not ref or ref.startswith("//") or re.match(r"[a-zA-Z][a-zA-Z0-9+.-]*:", ref):
+        return None
+    if ref.startswith("/"):
+        if not ref.startswith(basepath):
+            return None
+        path = ref[len(basepath):]
+    else:
+        path = posixpath.join(posixpath.dirname(base_relpath.replace(os.sep, "/")), ref)
+    path = posixpath.normpath(path)
+    if path in (".", "..") or path.startswith("../"):
+        return None
+    return path
+
+def page_references(html: str, relpath: str, basepath: str):
+    for match in _REFERENCE.finditer(html):
+        path = resolve_reference(match.group(1), relpath, basepath)
+        if path is not None:
+            yield path
+
+def css_references(css: str, relpath: str, basepath: str = "/"):
+    for match in _CSS_REFERENCE.finditer(css):
+        path = resolve_reference(match.group(2) or match.group(4), relpath, basepath)
+        if path is not None:
+            yield path
+
+class ReferenceCollector:
+    def __init__(self, output, basepath: str, references: set):
+        self.output = output
+        self.basepath = basepath
+        self.references = references
+
+    def write_bytes(self, relpath: str, data: bytes):
+        # Whole pages are scanned, so template and inlined-CSS references
+        # count as well as the ones from markdown.
+        if relpath.endswith(".html"):
+            text = data.decode("utf-8")
+            self.references.update(page_references(text, relpath, self.basepath))
+            self.references.update(css_references(text, relpath, self.basepath))
+        self.output.write_bytes(relpath, data)
+
+    def add_file(self, relpath: str, src_path: str, fs):
+        self.output.add_file(relpath, src_path, fs)
+
+    def close(self):
+        self.output.close()
+
+def static_files(static_dir: str, fs) -> dict:
+    files = {}
+    for root, _, names in fs.walk(static_dir):
+        for name in names:
+            path = os.path.join(root, name)
+            files[os.path.relpath(path, static_dir).replace(os.sep, "/")] = path
+    return files
+
+def used_static_files(static_dir: str, references: set, fs, keep=()) -> set:
+    files = static_files(static_dir, fs)
+    patterns = ALWAYS_KEEP + tuple(keep)
+    used = {relpath for relpath in files if any(fnmatch.fnmatch(relpath, pattern) for pattern in patterns)}
+    pending = [relpath for relpath in references if relpath in files]
+    # Stylesheets pull in fonts, images and other stylesheets.
+    while pending:
+        relpath = pending.pop()
+        if relpath in used:
+            continue
+        used.add(relpath)
+        if relpath.endswith(".css"):
+            css = fs.read_text(files[relpath])
+            pending.extend(path for path in css_references(css, relpath) if path in files)
+    return used
+
+def report_orphans(static_dir: str, used: set, fs):
+    orphans = sorted(set(static_files(static_dir, fs)) - used)
+    saved = 0
+    for relpath in orphans:
+        size = fs.getsize(os.path.join(static_dir, relpath))
+        saved += size
+        buildlog.debug("orphan", f"Skipped orphaned asset: {relpath} ({size} bytes)", path=relpath, bytes=size)
+    buildlog.info("tree-shake", f"Tree-shaking skipped {len(orphans)} orphaned asset(s), saving {saved} bytes", count=len(orphans), bytes=saved)
+    return orphans, saved
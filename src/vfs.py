@@ -0,0 +1,310 @@
+import io, os, posixpath, shutil
+
+class DiskFS:
+    def read_bytes(self, path: str) -> bytes:
+        with open(path, "rb") as f:
+            return f.read()
+
+    def read_text(self, path: str) -> str:
+        with open(path, "r") as f:
+            return f.read()
+
+    def open_bytes(self, path: str):
+        return open(path, "rb")
+
+    def write_bytes(self, path: str, data: bytes):
+        # Output trees may share inodes with other generations or targets,
+        # so replace files rather than writing through them.
+        if os.path.lexists(path):
+            os.remove(path)
+        with open(path, "wb") as f:
+            f.write(data)
+
+    def write_text(self, path: str, text: str):
+        self.write_bytes(path, text.encode("utf-8"))
+
+    def exists(self, path: str) -> bool:
+        return os.path.exists(path)
+
+    def isfile(self, path: str) -> bool:
+        return os.path.isfile(path)
+
+    def isdir(self, path: str) -> bool:
+        return os.path.isdir(path)
+
+    def listdir(self, path: str) -> list:
+        return os.listdir(path)
+
+    def walk(self, top: str):
+        return os.walk(top)
+
+    def getsize(self, path: str) -> int:
+        return os.path.getsize(path)
+
+    def stat_key(self, path: str):
+        stat = os.stat(path)
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def makedirs(self, path: str):
+        os.makedirs(path, exist_ok=True)
+
+    def remove(self, path: str):
+        os.remove(path)
+
+    def rmtree(self, path: str):
+        shutil.rmtree(path)
+
+    def copy_file(self, src: str, dst: str):
+        if os.path.lexists(dst):
+            os.remove(dst)
+        shutil.copy(src, dst)
+
+    def link(self, src: str, dst: str):
+        if os.path.lexists(dst):
+            os.remove(dst)
+        os.link(src, dst)
+
+def _normalize(path: str) -> str:
+    # Memory paths are plain keys; "./a", "a/" and "/a" all name "a".
+    path = posixpath.normpath(path.replace(os.sep, "/")).lstrip("/")
+    return "" if path == "." else path
+
+def _parents(path: str):
+    parent = posixpath.dirname(path)
+    while parent:
+        yield parent
+        parent = posixpath.dirname(parent)
+
+class MemoryFS:
+    def __init__(self, files: dict = None):
+        self.files = {}
+        # Directory -> names directly inside it, so listing a directory
+        # never scans the whole tree.
+        self.dirs = {"": set()}
+        self._versions = {}
+        for path, data in (files or {}).items():
+            if isinstance(data, str):
+                data = data.encode("utf-8")
+            self.makedirs(posixpath.dirname(_normalize(path)))
+            self.write_bytes(path, data)
+
+    def read_bytes(self, path: str) -> bytes:
+        try:
+            return self.files[_normalize(path)]
+        except KeyError:
+            raise FileNotFoundError(path) from None
+
+    def read_text(self, path: str) -> str:
+        return self.read_bytes(path).decode("utf-8")
+
+    def open_bytes(self, path: str):
+        return io.BytesIO(self.read_bytes(path))
+
+    def write_bytes(self, path: str, data: bytes):
+        path = _normalize(path)
+        parent = posixpath.dirname(path)
+        if parent not in self.dirs:
+            raise FileNotFoundError(f"No such directory: {parent}")
+        self.files[path] = bytes(data)
+        self.dirs[parent].add(posixpath.basename(path))
+        self._versions[path] = self._versions.get(path, 0) + 1
+
+    def write_text(self, path: str, text: str):
+        self.write_bytes(path, text.encode("utf-8"))
+
+    def exists(self, path: str) -> bool:
+        path = _normalize(path)
+        return path in self.files or path in self.dirs
+
+    def isfile(self, path: str) -> bool:
+        return _normalize(path) in self.files
+
+    def isdir(self, path: str) -> bool:
+        return _normalize(path) in self.dirs
+
+    def listdir(self, path: str) -> list:
+        path = _normalize(path)
+        if path not in self.dirs:
+            raise FileNotFoundError(path)
+        return sorted(self.dirs[path])
+
+    def walk(self, top: str):
+        top = _normalize(top)
+        if top not in self.dirs:
+            return
+        pending = [top]
+        while pending:
+            root = pending.pop()
+            dirs, files = [], []
+            for name in self.listdir(root):
+                child = posixpath.join(root, name) if root else name
+                (dirs if child in self.dirs else files).append(name)
+            yield root, dirs, files
+            pending.extend(reversed([posixpath.join(root, name) if root else name for name in dirs]))
+
+    def getsize(self, path: str) -> int:
+        return len(self.read_bytes(path))
+
+    def stat_key(self, path: str):
+        path = _normalize(path)
+        if path not in self.files:
+            raise FileNotFoundError(path)
+        return (self._versions[path], len(self.files[path]))
+
+    def makedirs(self, path: str):
+        path = _normalize(path)
+        missing = []
+        while path not in self.dirs:
+            if path in self.files:
+                raise FileExistsError(path)
+            missing.append(path)
+            path = posixpath.dirname(path)
+        for path in reversed(missing):
+            self.dirs[posixpath.dirname(path)].add(posixpath.basename(path))
+            self.dirs[path] = set()
+
+    def remove(self, path: str):
+        path = _normalize(path)
+        if path not in self.files:
+            raise FileNotFoundError(path)
+        del self.files[path]
+        self.dirs[posixpath.dirname(path)].discard(posixpath.basename(path))
+
+    def rmtree(self, path: str):
+        path = _normalize(path)
+        if path not in self.dirs:
+            return
+        pending = [path]
+        while pending:
+            root = pending.pop()
+            for name in self.dirs.pop(root):
+                child = posixpath.join(root, name) if root else name
+                if child in self.dirs:
+                    pending.append(child)
+                else:
+                    del self.files[child]
+        if path:
+            self.dirs[posixpath.dirname(path)].discard(posixpath.basename(path))
+        else:
+            self.dirs[""] = set()
+
+    def copy_file(self, src: str, dst: str):
+        self.write_bytes(dst, self.read_bytes(src))
+
+    def link(self, src: str, dst: str):
+        # Bytes are immutable, so sharing them is as cheap as a hardlink.
+        self.copy_file(src, dst)
+
+# Reads fall through to the lower layer; every write lands in the upper one.
+class OverlayFS:
+    def __init__(self, upper, lower):
+        self.upper = upper
+        self.lower = lower
+        self.deleted = set()
+        # Directories removed and then recreated: nothing below them shows
+        # through from the lower layer any more.
+        self.opaque = set()
+
+    def _visible_in_lower(self, path: str) -> bool:
+        path = _normalize(path)
+        if path in self.deleted:
+            return False
+        return not any(parent in self.deleted or parent in self.opaque for parent in _parents(path))
+
+    def _reader(self, path: str):
+        if self.upper.exists(path) or not self._visible_in_lower(path):
+            return self.upper
+        return self.lower
+
+    def read_bytes(self, path: str) -> bytes:
+        return self._reader(path).read_bytes(path)
+
+    def read_text(self, path: str) -> str:
+        return self._reader(path).read_text(path)
+
+    def open_bytes(self, path: str):
+        return self._reader(path).open_bytes(path)
+
+    def _prepare_write(self, path: str):
+        parent = os.path.dirname(path)
+        if parent and not self.upper.isdir(parent):
+            if not self.isdir(parent):
+                raise FileNotFoundError(f"No such directory: {parent}")
+            self.upper.makedirs(parent)
+        self.deleted.discard(_normalize(path))
+
+    def write_bytes(self, path: str, data: bytes):
+        self._prepare_write(path)
+        self.upper.write_bytes(path, data)
+
+    def write_text(self, path: str, text: str):
+        self.write_bytes(path, text.encode("utf-8"))
+
+    def exists(self, path: str) -> bool:
+        return self.upper.exists(path) or (self._visible_in_lower(path) and self.lower.exists(path))
+
+    def isfile(self, path: str) -> bool:
+        return self.upper.isfile(path) or (self._visible_in_lower(path) and self.lower.isfile(path))
+
+    def isdir(self, path: str) -> bool:
+        return self.upper.isdir(path) or (self._visible_in_lower(path) and self.lower.isdir(path))
+
+    def listdir(self, path: str) -> list:
+        entries = set()
+        if self.upper.isdir(path):
+            entries.update(self.upper.listdir(path))
+        if self._visible_in_lower(path) and self.lower.isdir(path):
+            base = _normalize(path)
+            entries.update(
+                name for name in self.lower.listdir(path)
+                if self._visible_in_lower(posixpath.join(base, name) if base else name)
+            )
+        if not entries and not self.isdir(path):
+            raise FileNotFoundError(path)
+        return sorted(entries)
+
+    def walk(self, top: str):
+        if not self.isdir(top):
+            return
+        pending = [top]
+        while pending:
+            root = pending.pop()
+            dirs, files = [], []
+            for name in self.listdir(root):
+                (dirs if self.isdir(posixpath.join(root, name)) else files).append(name)
+            yield root, dirs, files
+            pending.extend(reversed([posixpath.join(root, name) for name in dirs]))
+
+    def getsize(self, path: str) -> int:
+        return self._reader(path).getsize(path)
+
+    def stat_key(self, path: str):
+        reader = self._reader(path)
+        return (id(reader),) + tuple(reader.stat_key(path))
+
+    def makedirs(self, path: str):
+        self.upper.makedirs(path)
+        path = _normalize(path)
+        if path in self.deleted:
+            self.deleted.discard(path)
+            self.opaque.add(path)
+
+    def remove(self, path: str):
+        if not self.isfile(path):
+            raise FileNotFoundError(path)
+        if self.upper.isfile(path):
+            self.upper.remove(path)
+        self.deleted.add(_normalize(path))
+
+    def rmtree(self, path: str):
+        if self.upper.isdir(path):
+            self.upper.rmtree(path)
+        self.deleted.add(_normalize(path))
+
+    def copy_file(self, src: str, dst: str):
+        self.write_bytes(dst, self.read_bytes(src))
+
+    def link(self, src: str, dst: str):
+        self.copy_file(src, dst)
+
+DISK = DiskFS()